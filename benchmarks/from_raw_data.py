@@ -0,0 +1,188 @@
+"""
+Сравнение скорости разбора твитов: Tweet.from_raw_data против прежнего пути,
+при котором вложенные модели сериализовались model_dump() и проверялись повторно.
+
+    python benchmarks/from_raw_data.py                 # синтетическая лента
+    python benchmarks/from_raw_data.py response.json   # сохраненный ответ UserTweets
+"""
+
+from datetime import datetime
+from timeit import repeat
+import json
+import sys
+
+from twitter.models import Tweet, User
+from twitter.utils import tweets_data_from_instructions, tweet_url
+
+
+def _user_from_raw_data_validated(data: dict) -> User:
+    legacy = data["legacy"]
+    keys = ("name", "description", "location", "followers_count", "friends_count")
+    values = {key: legacy[key] for key in keys}
+    values.update(
+        {
+            "id": int(data["rest_id"]),
+            "username": legacy["screen_name"],
+            "created_at": datetime.strptime(
+                legacy["created_at"], "%a %b %d %H:%M:%S +0000 %Y"
+            ),
+            "raw_data": data,
+        }
+    )
+    return User(**values)
+
+
+def _tweet_from_raw_data_validated(data: dict) -> Tweet:
+    """
+    Прежняя реализация Tweet.from_raw_data.
+    """
+    legacy_data = data["legacy"]
+    user = _user_from_raw_data_validated(data["core"]["user_results"]["result"])
+    id = int(legacy_data["id_str"])
+
+    retweeted_tweet = None
+    if "retweeted_status_result" in legacy_data:
+        retweeted_tweet = _tweet_from_raw_data_validated(
+            legacy_data["retweeted_status_result"]["result"]
+        )
+
+    quoted_tweet = None
+    if "quoted_status_result" in data:
+        quoted_tweet = _tweet_from_raw_data_validated(
+            data["quoted_status_result"]["result"]
+        )
+
+    values = {
+        "id": id,
+        "text": legacy_data["full_text"],
+        "language": legacy_data["lang"],
+        "created_at": datetime.strptime(
+            legacy_data["created_at"], "%a %b %d %H:%M:%S +0000 %Y"
+        ),
+        "conversation_id": int(legacy_data["conversation_id_str"]),
+        "quoted": legacy_data["is_quote_status"],
+        "retweeted": legacy_data["retweeted"],
+        "bookmarked": legacy_data["bookmarked"],
+        "favorited": legacy_data["favorited"],
+        "quote_count": legacy_data["quote_count"],
+        "retweet_count": legacy_data["retweet_count"],
+        "bookmark_count": legacy_data["bookmark_count"],
+        "favorite_count": legacy_data["favorite_count"],
+        "reply_count": legacy_data["reply_count"],
+        "user": user.model_dump(),
+        "quoted_tweet": quoted_tweet.model_dump() if quoted_tweet else None,
+        "retweeted_tweet": retweeted_tweet.model_dump() if retweeted_tweet else None,
+        "url": tweet_url(user.username, id),
+        "raw_data": data,
+    }
+    return Tweet(**values)
+
+
+def _user_data(n: int) -> dict:
+    return {
+        "__typename": "User",
+        "id": f"VXNlcjo{n}",
+        "rest_id": str(1_000_000 + n),
+        "is_blue_verified": n % 3 == 0,
+        "legacy": {
+            "created_at": "Wed Oct 10 20:19:24 +0000 2018",
+            "default_profile": True,
+            "description": "Lorem ipsum dolor sit amet " * 4,
+            "entities": {"description": {"urls": []}},
+            "fast_followers_count": 0,
+            "favourites_count": 5120,
+            "followers_count": 1000 + n,
+            "friends_count": 300 + n,
+            "listed_count": 12,
+            "location": "Earth",
+            "media_count": 42,
+            "name": f"User {n}",
+            "normal_followers_count": 1000 + n,
+            "pinned_tweet_ids_str": [],
+            "profile_image_url_https": f"https://pbs.twimg.com/profile_images/{n}/a_normal.jpg",
+            "screen_name": f"user{n}",
+            "statuses_count": 2048,
+            "verified": False,
+        },
+    }
+
+
+def _tweet_data(n: int, quoted: dict = None) -> dict:
+    data = {
+        "__typename": "Tweet",
+        "rest_id": str(1_700_000_000_000_000_000 + n),
+        "core": {"user_results": {"result": _user_data(n % 50)}},
+        "views": {"count": str(n * 17), "state": "EnabledWithCount"},
+        "legacy": {
+            "bookmark_count": n % 7,
+            "bookmarked": False,
+            "created_at": "Thu Feb 01 12:34:56 +0000 2024",
+            "conversation_id_str": str(1_700_000_000_000_000_000 + n),
+            "entities": {
+                "hashtags": [],
+                "symbols": [],
+                "urls": [],
+                "user_mentions": [],
+            },
+            "favorite_count": n * 3,
+            "favorited": False,
+            "full_text": f"Tweet number {n}. " * 8,
+            "id_str": str(1_700_000_000_000_000_000 + n),
+            "is_quote_status": quoted is not None,
+            "lang": "en",
+            "quote_count": 1,
+            "reply_count": 2,
+            "retweet_count": 3,
+            "retweeted": False,
+            "user_id_str": str(1_000_000 + n % 50),
+        },
+    }
+    if quoted:
+        data["quoted_status_result"] = {"result": quoted}
+    return data
+
+
+def _synthetic_timeline(count: int = 100) -> list[dict]:
+    return [
+        _tweet_data(n, quoted=_tweet_data(n + count) if n % 4 == 0 else None)
+        for n in range(count)
+    ]
+
+
+def _load_timeline(filepath: str) -> list[dict]:
+    with open(filepath, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    instructions = data["data"]["user"]["result"]["timeline_v2"]["timeline"][
+        "instructions"
+    ]
+    return tweets_data_from_instructions(instructions)
+
+
+def main():
+    tweets_data = (
+        _load_timeline(sys.argv[1]) if len(sys.argv) > 1 else _synthetic_timeline()
+    )
+
+    for old, new in zip(
+        map(_tweet_from_raw_data_validated, tweets_data),
+        map(Tweet.from_raw_data, tweets_data),
+    ):
+        assert old.model_dump() == new.model_dump()
+
+    results = {}
+    for name, parse in (
+        ("validated (model_dump)", _tweet_from_raw_data_validated),
+        ("from_raw_data", Tweet.from_raw_data),
+    ):
+        times = repeat(
+            lambda: [parse(data) for data in tweets_data], number=20, repeat=5
+        )
+        results[name] = min(times) / (20 * len(tweets_data))
+        print(f"{name:<24} {results[name] * 1e6:8.1f} us/tweet")
+
+    speedup = results["validated (model_dump)"] / results["from_raw_data"]
+    print(f"{len(tweets_data)} tweets, speedup: x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import pytest
+
+from twitter import Account, AccountStore
+
+AUTH_TOKEN = "a" * 40
+
+
+@pytest.fixture
+def store(tmp_path):
+    with AccountStore(tmp_path / "accounts.db") as store:
+        yield store
+
+
+def test_add_skips_existing_auth_token(store):
+    assert len(store.add([Account(auth_token=AUTH_TOKEN)])) == 1
+    assert store.add([Account(auth_token=AUTH_TOKEN)]) == []
+    assert store.count() == 1
+
+
+def test_add_skips_readded_account_without_auth_token(store):
+    account = Account(username="noauth", password="password")
+    assert store.add([account]) == [account]
+    assert store.add([account]) == []
+    assert store.add([Account(username="noauth", password="password")]) == []
+    assert store.count() == 1
+
+    claimed = store.claim(10)
+    assert claimed == [account]
+    assert claimed[0] is account
+
+
+def test_add_rejects_account_without_identity(store):
+    with pytest.raises(ValueError):
+        store.add([Account(password="password")])
@@ -8,24 +8,50 @@ A Python library for interacting with the Twitter API.
 from .client import Client
 from .account import (
     Account,
+    CompactAccount,
     AccountStatus,
     load_accounts_from_file,
+    iter_accounts_from_file,
     extract_accounts_to_file,
+    MalformedLine,
 )
-from .models import Tweet, User, Media, Image
+from .models import Tweet, User, Media, Image, SessionSnapshot
+from .base import TransportPool
+from .rate_limit import RateLimiter, RateLimit
+from .retry import RetryPolicy
+from .cache import Cache, MediaCache
+from .pool import AccountPool, PoolResult
+from .checker import check_accounts
+from .runner import ShardedRunner
+from .store import AccountStore
 from . import errors, utils
 
 __all__ = [
     "Client",
     "Account",
+    "CompactAccount",
     "AccountStatus",
     "Tweet",
     "User",
     "Media",
     "Image",
+    "SessionSnapshot",
+    "TransportPool",
+    "RateLimiter",
+    "RateLimit",
+    "RetryPolicy",
+    "Cache",
+    "MediaCache",
+    "AccountPool",
+    "PoolResult",
+    "check_accounts",
+    "ShardedRunner",
+    "AccountStore",
     "utils",
     "errors",
     "load_accounts_from_file",
+    "iter_accounts_from_file",
+    "MalformedLine",
     "extract_accounts_to_file",
 ]
 
@@ -1,24 +1,25 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
 from pathlib import Path
-from typing import Sequence, Iterable
+from functools import cache
+from typing import Annotated, Callable, Iterator, Literal, Sequence, Iterable
+import csv
+import hashlib
+import json
 
-from pydantic import Field
+from loguru import logger
+from pydantic import Field, TypeAdapter, ValidationError
 import pyotp
 
 from .utils import hidden_value, load_lines, write_lines
 from .enums import AccountStatus
 from .models import User
 
+_AUTH_TOKEN_PATTERN = r"^[a-f0-9]{40}$"
 
-class Account(User):
-    # fmt: off
-    auth_token:  str | None = Field(default=None, pattern=r"^[a-f0-9]{40}$")
-    ct0:         str | None = None  # 160
-    password:    str | None = None  # 128
-    email:       str | None = None  # 254
-    totp_secret: str | None = None  # 16
-    backup_code: str | None = None  # 12
-    status: AccountStatus = AccountStatus.UNKNOWN
-    # fmt: on
+
+class _AccountMixin:
+    __slots__ = ()
 
     @property
     def hidden_auth_token(self) -> str | None:
@@ -36,23 +37,155 @@ class Account(User):
     def hidden_backup_code(self) -> str | None:
         return hidden_value(self.backup_code) if self.backup_code else None
 
+    @property
+    def storage_key(self) -> str | None:
+        """
+        Имя для файлов аккаунта (сессии, кеша медиа): хеш auth_token, а не сам секрет.
+        Без auth_token - хеш имени пользователя или почты.
+        """
+        value = self.auth_token or self.username or self.email
+        return hashlib.sha256(value.encode()).hexdigest()[:16] if value else None
+
+    def get_totp_code(self) -> str | None:
+        if not self.totp_secret:
+            raise ValueError("No totp_secret")
+
+        return str(pyotp.TOTP(self.totp_secret).now())
+
+
+class Account(User, _AccountMixin):
+    # fmt: off
+    auth_token:  str | None = Field(default=None, pattern=_AUTH_TOKEN_PATTERN)
+    ct0:         str | None = None  # 160
+    password:    str | None = None  # 128
+    email:       str | None = None  # 254
+    totp_secret: str | None = None  # 16
+    backup_code: str | None = None  # 12
+    status: AccountStatus = AccountStatus.UNKNOWN
+    info_updated_at:   datetime | None = None
+    status_updated_at: datetime | None = None
+    # fmt: on
+
     def __str__(self):
         return self.hidden_auth_token
 
     def __repr__(self):
         return f"{self.__class__.__name__}(id={self.id}, username={self.username}, auth_token={self.hidden_auth_token})"
 
-    def update(self, **data: dict):
-        update = self.dict()
-        update.update(data)
-        for k, v in self.validate(update).dict(exclude_defaults=True).items():
-            setattr(self, k, v)
+    def update(self, **data) -> tuple[str, ...]:
+        """
+        Проверяет и записывает только переданные поля.
+        Неизвестные поля и значения по умолчанию (например, None) пропускаются.
 
-    def get_totp_code(self) -> str | None:
-        if not self.totp_secret:
-            raise ValueError("No totp_secret")
+        :return: Имена измененных полей.
+        """
+        changed = []
+        fields = self.model_fields
+        for name, value in data.items():
+            if name not in fields or value == fields[name].default:
+                continue
+            if getattr(self, name) == value:
+                continue
+            self.__pydantic_validator__.validate_assignment(self, name, value)
+            changed.append(name)
+        return tuple(changed)
 
-        return str(pyotp.TOTP(self.totp_secret).now())
+
+@dataclass(slots=True, repr=False)
+class CompactAccount(_AccountMixin):
+    """
+    Компактное представление аккаунта для хранения сотен тысяч аккаунтов в памяти.
+    В отличие от Account не хранит raw_data и не является pydantic моделью,
+    но поддерживает model_validate, model_dump и update.
+
+    Для работы с клиентом превращается в Account методом to_account.
+    """
+
+    # fmt: off
+    auth_token:  Annotated[str | None, Field(pattern=_AUTH_TOKEN_PATTERN)] = None
+    ct0:         str | None = None
+    password:    str | None = None
+    email:       str | None = None
+    totp_secret: str | None = None
+    backup_code: str | None = None
+    status: AccountStatus = AccountStatus.UNKNOWN
+    info_updated_at:   datetime | None = None
+    status_updated_at: datetime | None = None
+
+    id:              int      | None = None
+    username:        str      | None = None
+    name:            str      | None = None
+    created_at:      datetime | None = None
+    description:     str      | None = None
+    location:        str      | None = None
+    followers_count: int      | None = None
+    friends_count:   int      | None = None
+    # fmt: on
+
+    def __str__(self):
+        return self.hidden_auth_token
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(id={self.id}, username={self.username}, auth_token={self.hidden_auth_token})"
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @classmethod
+    def model_validate(cls, obj: "dict | Account | CompactAccount") -> "CompactAccount":
+        if isinstance(obj, Account):
+            return cls.from_account(obj)
+        return _COMPACT_ACCOUNT_ADAPTER.validate_python(obj)
+
+    def model_dump(
+        self,
+        *,
+        mode: Literal["python", "json"] = "python",
+        include: set[str] = None,
+        exclude: set[str] = None,
+        exclude_none: bool = False,
+    ) -> dict:
+        return _COMPACT_ACCOUNT_ADAPTER.dump_python(
+            self, mode=mode, include=include, exclude=exclude, exclude_none=exclude_none
+        )
+
+    @classmethod
+    def from_account(cls, account: Account) -> "CompactAccount":
+        """
+        Данные Account уже проверены, поэтому копируются без повторной проверки.
+        """
+        return cls(**{name: getattr(account, name) for name in _COMPACT_FIELDS})
+
+    def to_account(self) -> Account:
+        return Account.model_construct(
+            **{name: getattr(self, name) for name in _COMPACT_FIELDS}
+        )
+
+    def update(self, **data) -> tuple[str, ...]:
+        """
+        Проверяет и записывает только переданные поля.
+        Неизвестные поля и значения по умолчанию (например, None) пропускаются.
+
+        :return: Имена измененных полей.
+        """
+        changed = []
+        for name, value in data.items():
+            if name not in _COMPACT_FIELDS or value == _COMPACT_FIELDS[name].default:
+                continue
+            if getattr(self, name) == value:
+                continue
+            setattr(self, name, _compact_field_adapter(name).validate_python(value))
+            changed.append(name)
+        return tuple(changed)
+
+
+_COMPACT_FIELDS = {field.name: field for field in fields(CompactAccount)}
+_COMPACT_ACCOUNT_ADAPTER = TypeAdapter(CompactAccount)
+
+
+@cache
+def _compact_field_adapter(name: str) -> TypeAdapter:
+    return TypeAdapter(_COMPACT_FIELDS[name].type)
 
 
 def load_accounts_from_file(
@@ -75,9 +208,129 @@ def load_accounts_from_file(
     return accounts
 
 
+@dataclass
+class MalformedLine:
+    line_number: int
+    line: str
+    error: str
+
+
+def _log_malformed_line(malformed_line: MalformedLine):
+    logger.warning(
+        f"Malformed account line {malformed_line.line_number}: {malformed_line.error}"
+    )
+
+
+_ACCOUNTS_ADAPTER = TypeAdapter(list[Account])
+_COMPACT_ACCOUNTS_ADAPTER = TypeAdapter(list[CompactAccount])
+
+
+def _iter_accounts_data(
+    filepath: Path | str,
+    format: Literal["txt", "jsonl", "csv"],
+    separator: str,
+    fields: Sequence[str],
+) -> Iterator[tuple[int, str, dict | None, str | None]]:
+    """
+    :return: Номер строки, строка, данные аккаунта и ошибка разбора.
+    """
+    with open(filepath, "r", newline="" if format == "csv" else None) as file:
+        if format == "csv":
+            reader = csv.DictReader(file, delimiter=separator)
+            for row in reader:
+                line = separator.join(str(value or "") for value in row.values())
+                data = {key: value or None for key, value in row.items()}
+                yield reader.line_num, line, data, None
+            return
+
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            if format == "jsonl":
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_number, line, None, str(exc)
+                    continue
+                if not isinstance(data, dict):
+                    yield line_number, line, None, "Expected JSON object"
+                    continue
+            else:
+                data = dict(zip(fields, line.split(separator)))
+                data.update({key: None for key in data if not data[key]})
+
+            yield line_number, line, data, None
+
+
+def iter_accounts_from_file(
+    filepath: Path | str,
+    *,
+    format: Literal["txt", "jsonl", "csv"] = None,
+    separator: str = None,
+    fields: Sequence[str] = ("auth_token", "password", "email", "username"),
+    batch_size: int = 1000,
+    on_error: Callable[[MalformedLine], None] = _log_malformed_line,
+    compact: bool = False,
+) -> Iterator[Account | CompactAccount]:
+    """
+    Построчно читает файл и проверяет аккаунты пачками, не загружая файл в память целиком.
+    Некорректные строки пропускаются и передаются в on_error вместе с номером строки.
+
+    :param filepath: Путь до файла с данными об аккаунтах.
+    :param format: txt (данные через разделитель), jsonl (JSON объект на строку) или csv (с заголовком).
+        По умолчанию определяется по расширению файла.
+    :param separator: Разделитель между данными в строке. По умолчанию ":" для txt и "," для csv.
+    :param fields: Кортеж, содержащий имена полей в порядке их появления в строке (только для txt).
+    :param batch_size: Количество аккаунтов, проверяемых за раз.
+    :param on_error: Принимает некорректную строку. По умолчанию пишет предупреждение в лог.
+    :param compact: Возвращать CompactAccount вместо Account.
+    :return: Twitter аккаунты.
+    """
+    if format is None:
+        suffix = Path(filepath).suffix.lower()
+        format = {".jsonl": "jsonl", ".csv": "csv"}.get(suffix, "txt")
+    if separator is None:
+        separator = "," if format == "csv" else ":"
+
+    account_class = CompactAccount if compact else Account
+    accounts_adapter = _COMPACT_ACCOUNTS_ADAPTER if compact else _ACCOUNTS_ADAPTER
+    batch = []
+
+    def validate_batch() -> list[Account | CompactAccount]:
+        try:
+            return accounts_adapter.validate_python([data for _, _, data in batch])
+        except ValidationError:
+            pass
+
+        # В пачке есть некорректные аккаунты: проверяем по одному
+        accounts = []
+        for line_number, line, data in batch:
+            try:
+                accounts.append(account_class.model_validate(data))
+            except ValidationError as exc:
+                on_error(MalformedLine(line_number, line, str(exc)))
+        return accounts
+
+    lines = _iter_accounts_data(filepath, format, separator, fields)
+    for line_number, line, data, error in lines:
+        if error:
+            on_error(MalformedLine(line_number, line, error))
+            continue
+
+        batch.append((line_number, line, data))
+        if len(batch) >= batch_size:
+            yield from validate_batch()
+            batch.clear()
+
+    if batch:
+        yield from validate_batch()
+
+
 def extract_accounts_to_file(
     filepath: Path | str,
-    accounts: Iterable[Account],
+    accounts: Iterable[Account | CompactAccount],
     *,
     separator: str = ":",
     fields: Sequence[str] = ("auth_token", "password", "email", "username"),
@@ -1,7 +1,9 @@
 from .client import BaseHTTPClient
 from .session import BaseAsyncSession
+from .transport import TransportPool
 
 __all__ = [
     "BaseHTTPClient",
     "BaseAsyncSession",
+    "TransportPool",
 ]
@@ -1,6 +1,11 @@
+from typing import Iterable
+import asyncio
+
 from curl_cffi import requests
 from better_proxy import Proxy
 
+from .transport import TransportPool
+
 
 class BaseAsyncSession(requests.AsyncSession):
     """
@@ -8,6 +13,7 @@ class BaseAsyncSession(requests.AsyncSession):
         - Принимает прокси в формате URL и better-proxy.
         - По умолчанию устанавливает версию браузера chrome120.
         - По умолчанию устанавливает user-agent под версию браузера chrome120.
+        - Может использовать общий транспорт (TransportPool) вместе с другими сессиями.
     """
 
     proxy: Proxy | None
@@ -29,6 +35,8 @@ class BaseAsyncSession(requests.AsyncSession):
     def __init__(
         self,
         proxy: str | Proxy = None,
+        *,
+        transport_pool: TransportPool = None,
         **session_kwargs,
     ):
         self._proxy = None
@@ -37,6 +45,9 @@ class BaseAsyncSession(requests.AsyncSession):
         session_kwargs["impersonate"] = (
             session_kwargs.get("impersonate") or self.DEFAULT_IMPERSONATE
         )
+        self._shared_transport = transport_pool is not None
+        if self._shared_transport:
+            session_kwargs["async_curl"] = transport_pool.get(proxy)
         super().__init__(**session_kwargs)
         self.proxy = proxy
 
@@ -56,3 +67,40 @@ class BaseAsyncSession(requests.AsyncSession):
 
         self._proxy = Proxy.from_str(proxy) if proxy else None
         self.proxies = {"http": self._proxy.as_url, "https": self._proxy.as_url}
+
+    def export_cookies(self) -> list[dict]:
+        return [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": cookie.secure,
+            }
+            for cookie in self.cookies.jar
+        ]
+
+    def import_cookies(self, cookies: Iterable[dict]):
+        for cookie in cookies:
+            self.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+                secure=cookie.get("secure", False),
+            )
+
+    async def close(self):
+        if not self._shared_transport:
+            await super().close()
+            return
+
+        # Общий AsyncCurl закрывает TransportPool, сессия освобождает только свои curl хендлы
+        self._closed = True
+        while True:
+            try:
+                curl = self.pool.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if curl:
+                curl.close()
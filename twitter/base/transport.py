@@ -0,0 +1,49 @@
+from curl_cffi.aio import AsyncCurl
+from better_proxy import Proxy
+
+
+class TransportPool:
+    """
+    Общий транспорт для множества сессий:
+        - Сессии с одинаковым прокси используют один AsyncCurl:
+          общий пул соединений, DNS кеш и уже установленные TLS соединения.
+        - Куки и заголовки авторизации остаются у каждой сессии свои.
+        - Закрывается отдельно от сессий, после закрытия всех клиентов.
+    """
+
+    def __init__(self):
+        self._transports: dict[str | None, AsyncCurl] = {}
+
+    @staticmethod
+    def _key(proxy: str | Proxy | None) -> str | None:
+        if not proxy:
+            return None
+        if not isinstance(proxy, Proxy):
+            proxy = Proxy.from_str(proxy)
+        return proxy.as_url
+
+    def get(self, proxy: str | Proxy | None = None) -> AsyncCurl:
+        """
+        Должен вызываться внутри запущенного event loop.
+
+        :return: Общий AsyncCurl для переданного прокси.
+        """
+        key = self._key(proxy)
+        if key not in self._transports:
+            self._transports[key] = AsyncCurl()
+        return self._transports[key]
+
+    def __len__(self) -> int:
+        return len(self._transports)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        transports = list(self._transports.values())
+        self._transports.clear()
+        for transport in transports:
+            await transport.close()
@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import monotonic
+from typing import Generic, Hashable, TypeVar
+
+from .models import User, Tweet, Media
+from .utils import load_json, write_json
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """
+    LRU кеш с ограниченным размером и временем жизни записей.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300):
+        """
+        :param maxsize: Максимальное количество записей. При переполнении удаляются давно не используемые.
+        :param ttl: Время жизни записи (сек.).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: Hashable) -> T | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: T):
+        self._data[key] = (monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> T | None:
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] > monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class Cache:
+    """
+    Кеш пользователей и твитов для Client:
+        - Хранит готовые модели User и Tweet.
+        - Отдельное время жизни для пользователей и твитов.
+        - Клиент сбрасывает записи, которые изменяет сам (лайк, репост, изменение профиля и т.д.).
+
+    Для другого хранилища достаточно переопределить методы get_*, set_* и invalidate_*.
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int = 10_000,
+        user_ttl: float = 300,
+        tweet_ttl: float = 60,
+    ):
+        self.users: TTLCache[User] = TTLCache(maxsize, user_ttl)
+        self.usernames: TTLCache[int] = TTLCache(maxsize, user_ttl)
+        self.tweets: TTLCache[Tweet] = TTLCache(maxsize, tweet_ttl)
+
+    def get_user(self, user_id: int | str) -> User | None:
+        return self.users.get(int(user_id))
+
+    def get_user_by_username(self, username: str) -> User | None:
+        user_id = self.usernames.get(username.lower())
+        return self.users.get(user_id) if user_id is not None else None
+
+    def set_user(self, user: User):
+        self.users.set(user.id, user)
+        if user.username:
+            self.usernames.set(user.username.lower(), user.id)
+
+    def invalidate_user(self, user_id: int | str = None, username: str = None):
+        if user_id is not None:
+            user = self.users.pop(int(user_id))
+            if user and user.username:
+                self.usernames.pop(user.username.lower())
+        if username is not None:
+            user_id = self.usernames.pop(username.lower())
+            if user_id is not None:
+                self.users.pop(user_id)
+
+    def get_tweet(self, tweet_id: int | str) -> Tweet | None:
+        return self.tweets.get(int(tweet_id))
+
+    def set_tweet(self, tweet: Tweet):
+        self.tweets.set(tweet.id, tweet)
+
+    def invalidate_tweet(self, tweet_id: int | str):
+        self.tweets.pop(int(tweet_id))
+
+    def clear(self):
+        self.users.clear()
+        self.usernames.clear()
+        self.tweets.clear()
+
+    @property
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {"users": self.users.stats, "tweets": self.tweets.stats}
+
+
+class MediaCache:
+    """
+    Кеш загруженных медиа по хешу содержимого: повторная загрузка того же файла
+    возвращает еще действующий Media вместо новой загрузки.
+
+    media_id принадлежит аккаунту, который загрузил медиа,
+    поэтому у каждого аккаунта должен быть свой MediaCache.
+    """
+
+    def __init__(self, filepath: Path | str = None, *, margin: float = 300):
+        """
+        :param filepath: Файл, в котором кеш сохраняется между запусками. По умолчанию кеш хранится только в памяти.
+        :param margin: Медиа, которое истекает раньше, чем через margin секунд, считается истекшим.
+        """
+        self.filepath = Path(filepath) if filepath else None
+        self.margin = timedelta(seconds=margin)
+        self.hits = 0
+        self.misses = 0
+        self._media: dict[str, Media] = {}
+        if self.filepath and self.filepath.exists():
+            self.load()
+
+    def _expired(self, media: Media) -> bool:
+        return media.expires_at - self.margin <= datetime.now()
+
+    def get(self, key: str) -> Media | None:
+        media = self._media.get(key)
+        if media is not None and self._expired(media):
+            self.pop(key)
+            media = None
+
+        if media is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return media
+
+    def set(self, key: str, media: Media):
+        self._media[key] = media
+        if self.filepath:
+            self.save()
+
+    def pop(self, key: str) -> Media | None:
+        media = self._media.pop(key, None)
+        if media is not None and self.filepath:
+            self.save()
+        return media
+
+    def clear(self):
+        self._media.clear()
+        if self.filepath:
+            self.save()
+
+    def evict_expired(self) -> int:
+        """
+        :return: Количество удаленных записей.
+        """
+        expired = [key for key, media in self._media.items() if self._expired(media)]
+        for key in expired:
+            del self._media[key]
+        if expired and self.filepath:
+            self.save()
+        return len(expired)
+
+    def load(self):
+        data = load_json(self.filepath)
+        self._media = {key: Media.model_validate(media) for key, media in data.items()}
+        self.evict_expired()
+
+    def save(self):
+        data = {
+            key: media.model_dump(mode="json") for key, media in self._media.items()
+        }
+        write_json(self.filepath, data)
+
+    def __contains__(self, key: str) -> bool:
+        media = self._media.get(key)
+        return media is not None and not self._expired(media)
+
+    def __len__(self) -> int:
+        return len(self._media)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._media)}
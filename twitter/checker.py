@@ -0,0 +1,115 @@
+from pathlib import Path
+from time import monotonic
+from typing import AsyncIterator, Iterable, Sequence
+import asyncio
+
+from better_proxy import Proxy
+from loguru import logger
+
+from .account import Account
+from .base import TransportPool
+from .client import Client
+from .enums import AccountStatus
+
+
+async def _check_account(
+    account: Account,
+    proxy: str | Proxy | None,
+    transport_pool: TransportPool,
+    client_kwargs: dict,
+) -> tuple[Account, AccountStatus, float]:
+    # Параметры проверки заменяют переданные в client_kwargs, а не конфликтуют с ними
+    client_kwargs = {
+        **client_kwargs,
+        "transport_pool": transport_pool,
+        "update_account_info_on_startup": False,
+    }
+    client = Client(account, proxy=proxy, **client_kwargs)
+    start = monotonic()
+    try:
+        await client.establish_status()
+        status = account.status
+    except Exception as exc:
+        logger.warning(
+            f"(auth_token={account.hidden_auth_token}, id={account.id}, username={account.username})"
+            f" Failed to check account: {exc}"
+        )
+        status = AccountStatus.UNKNOWN
+    finally:
+        await client.close()
+    return account, status, monotonic() - start
+
+
+async def check_accounts(
+    accounts: Iterable[Account],
+    *,
+    proxies: Sequence[str | Proxy] = None,
+    concurrency: int = 1000,
+    output: Path | str = None,
+    separator: str = ":",
+    **client_kwargs,
+) -> AsyncIterator[tuple[Account, AccountStatus, float]]:
+    """
+    Проверяет статусы аккаунтов одним запросом на аккаунт (establish_status),
+    без запроса информации об аккаунте. Клиенты используют общий транспорт.
+
+    Аккаунты берутся из accounts по мере освобождения мест,
+    поэтому можно передавать генератор (например, iter_accounts_from_file).
+
+    :param accounts: Аккаунты.
+    :param proxies: Прокси. Распределяются между аккаунтами по кругу.
+    :param concurrency: Количество одновременных проверок.
+    :param output: Файл, в который по мере готовности дописываются строки auth_token:status:latency.
+    :param separator: Разделитель между данными в строке.
+    :param client_kwargs: Параметры Client.
+    :return: Аккаунт, статус и время проверки (сек.) по мере готовности.
+        Если проверить аккаунт не удалось (например, из-за прокси), статус UNKNOWN.
+    """
+    proxies = list(proxies or ())
+    accounts = iter(accounts)
+    exhausted = False
+    checked = 0
+    pending = set()
+    file = open(output, "a") if output else None
+
+    async with TransportPool() as transport_pool:
+        try:
+            while True:
+                while not exhausted and len(pending) < concurrency:
+                    account = next(accounts, None)
+                    if account is None:
+                        exhausted = True
+                        break
+
+                    proxy = proxies[checked % len(proxies)] if proxies else None
+                    checked += 1
+                    coroutine = _check_account(
+                        account, proxy, transport_pool, client_kwargs
+                    )
+                    pending.add(asyncio.create_task(coroutine))
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result = task.result()
+                    if file:
+                        _write_result(file, result, separator)
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+            if file:
+                file.close()
+
+
+def _write_result(file, result: tuple[Account, AccountStatus, float], separator: str):
+    account, status, latency = result
+    file.write(separator.join((account.auth_token or "", status, f"{latency:.3f}")))
+    file.write("\n")
+    file.flush()
@@ -1,12 +1,15 @@
-from typing import Any, Literal, Iterable
-from time import time
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Literal, Iterable, Sequence
 import asyncio
-import base64
+from pathlib import Path
+from types import MappingProxyType
 import json
 import re
 
 from loguru import logger
-from curl_cffi import requests
+from curl_cffi import requests, CurlMime
 from yarl import URL
 
 from ._capsolver.fun_captcha import FunCaptcha, FunCaptchaTypeEnm
@@ -14,6 +17,7 @@ from ._capsolver.fun_captcha import FunCaptcha, FunCaptchaTypeEnm
 from .errors import (
     TwitterException,
     FailedToFindDuplicatePost,
+    MediaProcessingFailed,
     HTTPException,
     BadRequest,
     Unauthorized,
@@ -30,11 +34,46 @@ from .errors import (
 )
 from .base import BaseHTTPClient
 from .account import Account, AccountStatus
-from .models import User, Tweet, Media, Subtask
+from .models import (
+    User,
+    Tweet,
+    Media,
+    ProcessingInfo,
+    Subtask,
+    SessionSnapshot,
+    RawDataPolicy,
+)
+from .rate_limit import RateLimiter
+from .retry import IDEMPOTENT_METHODS, RetryPolicy
+from .pagination import paginate
+from .singleflight import SingleFlight
+from .cache import Cache, MediaCache
+from .graphql import OPERATIONS, build_shared_registry
+from .upload import (
+    MediaSource,
+    SEGMENT_SIZE,
+    UploadCheckpoint,
+    describe_media,
+    guess_media_category,
+    iter_segments,
+    media_digest,
+)
 from .utils import parse_oauth_html
 from .utils import parse_unlock_html
 from .utils import tweets_data_from_instructions
+from .utils import users_data_from_instructions
+from .utils import cursor_from_instructions
 from .utils import encode_x_client_transaction_id
+from .utils import load_json, write_json
+
+AccountChangedCallback = Callable[[Account, tuple[str, ...], str], Any]
+# Информация о пользователе, которая записывается в аккаунт при его обновлении
+_ACCOUNT_INFO_FIELDS = frozenset(User.model_fields) - {"raw_data"}
+TweetMedia = bytes | str | Path | Media | int
+"""
+Медиа твита: байты или путь до файла (будут загружены), Media или media_id.
+Строка из цифр считается media_id, любая другая - путем до файла.
+"""
 
 
 class Client(BaseHTTPClient):
@@ -45,36 +84,13 @@ class Client(BaseHTTPClient):
         "x-twitter-active-user": "yes",
         "x-twitter-client-language": "en",
     }
-    _GRAPHQL_URL = "https://x.com/i/api/graphql"
-    _ACTION_TO_QUERY_ID = {
-        "CreateRetweet": "ojPdsZsimiJrUGLR1sjUtA",
-        "FavoriteTweet": "lI07N6Otwv1PhnEgXILM7A",
-        "UnfavoriteTweet": "ZYKSe-w7KEslx3JhSIk5LA",
-        "CreateTweet": "oB-5XsHNAbjvARJEc8CZFw",
-        "TweetResultByRestId": "V3vfsYzNEyD9tsf4xoFRgw",
-        "ModerateTweet": "p'jF:GVqCjTcZol0xcBJjw",
-        "DeleteTweet": "VaenaVgh5q5ih7kvyVjgtg",
-        "UserTweets": "V1ze5q3ijDS1VeLwLY0m7g",
-        "TweetDetail": "VWFGPVAGkZMGRKGe3GFFnA",
-        "ProfileSpotlightsQuery": "9zwVLJ48lmVUk8u_Gh9DmA",
-        "Following": "t-BPOrMIduGUJWO_LxcvNQ",
-        "Followers": "3yX7xr2hKjcZYnXt6cU6lQ",
-        "UserByScreenName": "G3KGOASz96M-Qu0nwmGXNg",
-        "UsersByRestIds": "itEhGywpgX9b3GJCzOtSrA",
-        "Viewer": "-876iyxD1O_0X0BqeykjZA",
-    }
+    _OPERATIONS = OPERATIONS
+    _USERS_BY_IDS_BATCH_SIZE = 100
+    _MEDIA_UPLOAD_URL = "https://upload.x.com/1.1/media/upload.json"
+    _MAX_TWEET_MEDIA = 4
     _CAPTCHA_URL = "https://x.com/account/access"
     _CAPTCHA_SITE_KEY = "0152B4EB-D2DC-460A-89A1-629838B529C9"
 
-    @classmethod
-    def _action_to_url(cls, action: str) -> tuple[str, str]:
-        """
-        :return: URL and Query ID
-        """
-        query_id = cls._ACTION_TO_QUERY_ID[action]
-        url = f"{cls._GRAPHQL_URL}/{query_id}/{action}"
-        return url, query_id
-
     def __init__(
         self,
         account: Account,
@@ -84,15 +100,33 @@ class Client(BaseHTTPClient):
         max_unlock_attempts: int = 5,
         auto_relogin: bool = True,
         update_account_info_on_startup: bool = True,
+        startup_mode: Literal["eager", "background", "lazy"] = "eager",
+        account_info_ttl: float = None,
+        rate_limiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+        cache: Cache = None,
+        on_account_changed: AccountChangedCallback = None,
+        raw_data: RawDataPolicy = "all",
+        media_cache: MediaCache = None,
         **session_kwargs,
     ):
         super().__init__(**session_kwargs)
         self.account = account
         self.wait_on_rate_limit = wait_on_rate_limit
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._inflight = SingleFlight()
+        self.cache = cache
         self.capsolver_api_key = capsolver_api_key
         self.max_unlock_attempts = max_unlock_attempts
         self.auto_relogin = auto_relogin
         self._update_account_info_on_startup = update_account_info_on_startup
+        self._startup_mode = startup_mode
+        self._account_info_ttl = account_info_ttl
+        self._startup_task: asyncio.Task | None = None
+        self.on_account_changed = on_account_changed
+        self.raw_data_policy = raw_data
+        self.media_cache = media_cache
 
         self.gql = GQLClient(self)
 
@@ -100,7 +134,88 @@ class Client(BaseHTTPClient):
         await self.on_startup()
         return await super().__aenter__()
 
+    def _update_account(self, reason: str, **fields) -> tuple[str, ...]:
+        """
+        Изменяет поля аккаунта и вызывает on_account_changed, если что-то изменилось.
+
+        :param reason: Причина изменения: "cookies", "status", "account_info", "session", "username", "password", "totp", "backup_code".
+        :return: Имена измененных полей.
+        """
+        changed = tuple(
+            name
+            for name, value in fields.items()
+            if getattr(self.account, name) != value
+        )
+        for name in changed:
+            setattr(self.account, name, fields[name])
+
+        if changed and self.on_account_changed is not None:
+            try:
+                self.on_account_changed(self.account, changed, reason)
+            except Exception as exc:
+                logger.error(
+                    f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
+                    f" on_account_changed({', '.join(changed)}, reason={reason}) failed: {exc!r}"
+                )
+        return changed
+
     async def _request(
+        self,
+        method: str,
+        url: str | URL,
+        *,
+        wait_on_rate_limit: bool = None,
+        retry_policy: RetryPolicy = None,
+        idempotent: bool = None,
+        **kwargs,
+    ) -> tuple[requests.Response, Any]:
+        """
+        :param idempotent: Можно ли безопасно повторить запрос после таймаута или 5xx.
+            По умолчанию только для GET, HEAD и OPTIONS.
+        """
+        if wait_on_rate_limit is None:
+            wait_on_rate_limit = self.wait_on_rate_limit
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        retry = (retry_policy or self.retry_policy).start(idempotent)
+        while True:
+            try:
+                return await self._request_once(
+                    method, url, wait_on_rate_limit=wait_on_rate_limit, **kwargs
+                )
+            except RateLimited:
+                if not wait_on_rate_limit:
+                    raise
+
+                # Лимит учтен в rate_limiter: следующая попытка дождется его сброса.
+                # Если время сброса неизвестно или уже прошло, ждем как перед обычным повтором
+                sleep_time = self.rate_limiter.wait_time(self.rate_limiter.key(url))
+                delay = 0 if sleep_time else retry.policy.delay(retry.attempts)
+                if not retry.wait(sleep_time or delay):
+                    raise
+
+                if delay:
+                    logger.warning(
+                        f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
+                        f" Request {method} {url} is rate limited without reset time."
+                        f" Retry {retry.attempts} in {delay:.1f} sec."
+                    )
+                    await asyncio.sleep(delay)
+
+            except (HTTPException, requests.errors.RequestsError) as exc:
+                delay = retry.next_delay(exc)
+                if delay is None:
+                    raise
+
+                logger.warning(
+                    f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
+                    f" Request {method} {url} failed: {exc.__class__.__name__}."
+                    f" Retry {retry.attempts} in {delay:.1f} sec."
+                )
+                await asyncio.sleep(delay)
+
+    async def _request_once(
         self,
         method: str,
         url: str | URL,
@@ -142,6 +257,19 @@ class Client(BaseHTTPClient):
         logger.debug(log_message)
         # fmt: on
 
+        if wait_on_rate_limit is None:
+            wait_on_rate_limit = self.wait_on_rate_limit
+
+        rate_limit_key = self.rate_limiter.key(url)
+        if wait_on_rate_limit:
+            sleep_time = self.rate_limiter.wait_time(rate_limit_key)
+            if sleep_time > 0:
+                logger.warning(
+                    f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
+                    f" Rate limit of {rate_limit_key} is exhausted! Sleep time: {int(sleep_time) + 1} sec."
+                )
+            await self.rate_limiter.acquire(rate_limit_key)
+
         try:
             response = await self._session.request(method, str(url), **kwargs)
         except requests.errors.RequestsError as exc:
@@ -153,6 +281,8 @@ class Client(BaseHTTPClient):
                 raise requests.errors.RequestsError(msg, 35, exc.response)
             raise
 
+        self.rate_limiter.update(rate_limit_key, response.headers)
+
         data = response.text
         # fmt: off
         logger.debug(f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
@@ -162,11 +292,11 @@ class Client(BaseHTTPClient):
         # fmt: on
 
         if ct0 := self._session.cookies.get("ct0", domain=".x.com"):
-            self.account.ct0 = ct0
+            self._update_account("cookies", ct0=ct0)
 
         auth_token = self._session.cookies.get("auth_token")
         if auth_token and auth_token != self.account.auth_token:
-            self.account.auth_token = auth_token
+            self._update_account("cookies", auth_token=auth_token)
             logger.warning(
                 f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
                 f" Requested new auth_token!"
@@ -182,7 +312,7 @@ class Client(BaseHTTPClient):
                 exc = HTTPException(response, data)
 
                 if 141 in exc.error_codes or 37 in exc.error_codes:
-                    self.account.status = AccountStatus.SUSPENDED
+                    self._update_account("status", status=AccountStatus.SUSPENDED)
                     raise AccountSuspended(exc, self.account)
 
                 if 326 in exc.error_codes:
@@ -192,10 +322,12 @@ class Client(BaseHTTPClient):
                             and error_data.get("bounce_location")
                             == "/i/flow/consent_flow"
                         ):
-                            self.account.status = AccountStatus.CONSENT_LOCKED
+                            self._update_account(
+                                "status", status=AccountStatus.CONSENT_LOCKED
+                            )
                             raise AccountConsentLocked(exc, self.account)
 
-                    self.account.status = AccountStatus.LOCKED
+                    self._update_account("status", status=AccountStatus.LOCKED)
                     raise AccountLocked(exc, self.account)
                 raise exc
 
@@ -205,7 +337,7 @@ class Client(BaseHTTPClient):
             exc = BadRequest(response, data)
 
             if 399 in exc.error_codes:
-                self.account.status = AccountStatus.NOT_FOUND
+                self._update_account("status", status=AccountStatus.NOT_FOUND)
                 raise AccountNotFound(exc, self.account)
 
             raise exc
@@ -214,7 +346,7 @@ class Client(BaseHTTPClient):
             exc = Unauthorized(response, data)
 
             if 32 in exc.error_codes:
-                self.account.status = AccountStatus.BAD_TOKEN
+                self._update_account("status", status=AccountStatus.BAD_TOKEN)
                 raise BadAccountToken(exc, self.account)
 
             raise exc
@@ -223,7 +355,7 @@ class Client(BaseHTTPClient):
             exc = Forbidden(response, data)
 
             if 64 in exc.error_codes:
-                self.account.status = AccountStatus.SUSPENDED
+                self._update_account("status", status=AccountStatus.SUSPENDED)
                 raise AccountSuspended(exc, self.account)
 
             if 326 in exc.error_codes:
@@ -232,10 +364,12 @@ class Client(BaseHTTPClient):
                         error_data.get("code") == 326
                         and error_data.get("bounce_location") == "/i/flow/consent_flow"
                     ):
-                        self.account.status = AccountStatus.CONSENT_LOCKED
+                        self._update_account(
+                            "status", status=AccountStatus.CONSENT_LOCKED
+                        )
                         raise AccountConsentLocked(exc, self.account)
 
-                self.account.status = AccountStatus.LOCKED
+                self._update_account("status", status=AccountStatus.LOCKED)
                 raise AccountLocked(exc, self.account)
 
             raise exc
@@ -244,31 +378,29 @@ class Client(BaseHTTPClient):
             raise NotFound(response, data)
 
         if response.status_code == 429:
-            if wait_on_rate_limit is None:
-                wait_on_rate_limit = self.wait_on_rate_limit
-            if not wait_on_rate_limit:
-                raise RateLimited(response, data)
-
-            reset_time = int(response.headers["x-rate-limit-reset"])
-            sleep_time = reset_time - int(time()) + 1
-            if sleep_time > 0:
-                logger.warning(
-                    f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
-                    f"Rate limited! Sleep time: {sleep_time} sec."
-                )
-                await asyncio.sleep(sleep_time)
-            return await self._request(
-                method,
-                url,
-                auth=auth,
-                bearer=bearer,
-                wait_on_rate_limit=wait_on_rate_limit,
-                **kwargs,
-            )
+            raise RateLimited(response, data)
 
         if response.status_code >= 500:
             raise ServerError(response, data)
 
+    async def _graphql_request(
+        self, operation: str, variables: dict = None, **kwargs
+    ) -> tuple[requests.Response, Any]:
+        """
+        :param operation: Имя операции из реестра _OPERATIONS.
+        :param variables: Переменные запроса. Дополняют переменные операции по умолчанию.
+        """
+        operation = self._OPERATIONS[operation]
+        if operation.method == "POST":
+            headers = kwargs["headers"] = kwargs.get("headers", {})
+            headers["content-type"] = "application/json"
+            return await self.request(
+                "POST", operation.url, data=operation.body(variables), **kwargs
+            )
+        return await self.request(
+            "GET", operation.url, params=operation.params(variables), **kwargs
+        )
+
     async def request(
         self,
         method: str,
@@ -290,13 +422,7 @@ class Client(BaseHTTPClient):
             return await self._request(method, url, **kwargs)
 
         except BadAccountToken:
-            if auto_relogin is None:
-                auto_relogin = self.auto_relogin
-            if (
-                not auto_relogin
-                or not self.account.password
-                or not (self.account.email or self.account.username)
-            ):
+            if not self._can_relogin(auto_relogin):
                 raise
 
             await self.relogin()
@@ -314,10 +440,167 @@ class Client(BaseHTTPClient):
             else:
                 raise
 
+    def _can_relogin(self, auto_relogin: bool = None) -> bool:
+        if auto_relogin is None:
+            auto_relogin = self.auto_relogin
+        return bool(
+            auto_relogin
+            and self.account.password
+            and (self.account.email or self.account.username)
+        )
+
+    async def close(self):
+        if self._startup_task and not self._startup_task.done():
+            self._startup_task.cancel()
+        await super().close()
+
+    def export_session(self) -> SessionSnapshot:
+        """
+        :return: Снимок сессии: куки, guest token и статус аккаунта.
+        """
+        return SessionSnapshot(
+            auth_token=self.account.auth_token,
+            ct0=self.account.ct0,
+            guest_token=self._session.headers.get("X-Guest-Token"),
+            cookies=self._session.export_cookies(),
+            id=self.account.id,
+            username=self.account.username,
+            status=self.account.status,
+            status_updated_at=self.account.status_updated_at,
+            info_updated_at=self.account.info_updated_at,
+        )
+
+    def import_session(self, snapshot: SessionSnapshot) -> bool:
+        """
+        Восстанавливает сессию из снимка.
+        Снимок другого auth_token игнорируется.
+
+        Вызывайте до входа в контекстный менеджер, чтобы вместе с account_info_ttl
+        не запрашивать на старте информацию об аккаунте и его статус повторно.
+
+        :return: Восстановлена ли сессия.
+        """
+        if (
+            self.account.auth_token
+            and snapshot.auth_token
+            and snapshot.auth_token != self.account.auth_token
+        ):
+            return False
+
+        self._session.import_cookies(snapshot.cookies)
+        if snapshot.guest_token:
+            self._session.headers["X-Guest-Token"] = snapshot.guest_token
+
+        account_data = snapshot.model_dump(
+            include={
+                "auth_token",
+                "ct0",
+                "id",
+                "username",
+                "status",
+                "status_updated_at",
+                "info_updated_at",
+            },
+            exclude_none=True,
+        )
+        self._update_account("session", **account_data)
+        return True
+
+    def _session_filepath(
+        self, path: Path | str, directory: bool = None, *, create: bool = False
+    ) -> Path:
+        path = Path(path)
+        if directory is None:
+            # Директория может еще не существовать: путь без расширения считается директорией
+            directory = path.is_dir() or not path.suffix
+        if not directory:
+            if create:
+                path.parent.mkdir(parents=True, exist_ok=True)
+            return path
+
+        if not self.account.storage_key:
+            raise ValueError("No auth_token, username or email to name session file")
+        if create:
+            path.mkdir(parents=True, exist_ok=True)
+        return path / f"{self.account.storage_key}.json"
+
+    def save_session(self, path: Path | str, *, directory: bool = None) -> Path:
+        """
+        :param path: Путь до файла или до директории, в которой файл будет назван по Account.storage_key.
+            Недостающие директории создаются.
+        :param directory: Является ли path директорией. По умолчанию директорией считается
+            существующая директория или путь без расширения.
+        :return: Путь до файла.
+        """
+        filepath = self._session_filepath(path, directory, create=True)
+        write_json(filepath, self.export_session().model_dump(mode="json"))
+        return filepath
+
+    def load_session(self, path: Path | str, *, directory: bool = None) -> bool:
+        """
+        :param path: Путь до файла или до директории, в которой файл назван по Account.storage_key.
+        :param directory: Является ли path директорией. См. save_session.
+        :return: Восстановлена ли сессия. False, если файла нет.
+        """
+        filepath = self._session_filepath(path, directory)
+        if not filepath.exists():
+            return False
+
+        snapshot = SessionSnapshot.model_validate(load_json(filepath))
+        return self.import_session(snapshot)
+
+    def _is_fresh(self, updated_at: datetime | None) -> bool:
+        return (
+            self._account_info_ttl is not None
+            and updated_at is not None
+            and datetime.now() - updated_at < timedelta(seconds=self._account_info_ttl)
+        )
+
+    async def _hydrate_account(self):
+        """
+        Запрашивает информацию об аккаунте и его статус, если они устарели.
+        Запросы выполняются одновременно, только если клиент не может перелогиниться:
+        иначе обновление информации может заменить куки, пока статус еще запрашивается.
+        """
+        steps = []
+        if not self._is_fresh(self.account.info_updated_at):
+            steps.append(partial(self.ensure_account_info, force=True))
+        if not self._is_fresh(self.account.status_updated_at):
+            steps.append(self.establish_status)
+
+        if len(steps) < 2 or self._can_relogin():
+            for step in steps:
+                await step()
+            return
+
+        # При ошибке одного запроса второй отменяется и дожидается, а не остается в фоне
+        tasks = [asyncio.create_task(step()) for step in steps]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _log_startup_error(self, task: asyncio.Task):
+        if task.cancelled() or not (exc := task.exception()):
+            return
+
+        logger.warning(
+            f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
+            f" Failed to update account info in background: {exc}"
+        )
+
     async def on_startup(self):
-        if self._update_account_info_on_startup:
-            await self.update_account_info()
-            await self.establish_status()
+        if not self._update_account_info_on_startup or self._startup_mode == "lazy":
+            return
+
+        if self._startup_mode == "background":
+            self._startup_task = asyncio.create_task(self._hydrate_account())
+            self._startup_task.add_done_callback(self._log_startup_error)
+            return
+
+        await self._hydrate_account()
 
     async def _request_oauth2_auth_code(
         self,
@@ -445,51 +728,49 @@ class Client(BaseHTTPClient):
     async def _update_account_username(self):
         url = "https://api.x.com/1.1/account/settings.json"
         response, response_json = await self.request("POST", url)
-        self.account.username = response_json["screen_name"]
+        self._update_account("username", username=response_json["screen_name"])
 
     async def _request_user_by_username(self, username: str) -> User | None:
-        url, query_id = self._action_to_url("UserByScreenName")
-        variables = {
-            "screen_name": username,
-            "withSafetyModeUserFields": True,
-        }
-        features = {
-            "hidden_profile_likes_enabled": True,
-            "hidden_profile_subscriptions_enabled": True,
-            "responsive_web_graphql_exclude_directive_enabled": True,
-            "verified_phone_label_enabled": False,
-            "subscriptions_verification_info_is_identity_verified_enabled": True,
-            "subscriptions_verification_info_verified_since_enabled": True,
-            "highlights_tweets_tab_ui_enabled": True,
-            "creator_subscriptions_tweet_preview_api_enabled": True,
-            "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-            "responsive_web_graphql_timeline_navigation_enabled": True,
-        }
-        field_toggles = {
-            "withAuxiliaryUserLabels": False,
-        }
-        params = {
-            "variables": variables,
-            "features": features,
-            "fieldToggles": field_toggles,
-        }
-        response, data = await self.request("GET", url, params=params)
+        key = self._inflight.key("UserByScreenName", {"screen_name": username.lower()})
+        return await self._inflight.do(
+            key, lambda: self._fetch_user_by_username(username)
+        )
+
+    async def _fetch_user_by_username(self, username: str) -> User | None:
+        response, data = await self._graphql_request(
+            "UserByScreenName", {"screen_name": username}
+        )
         if not data["data"]:
             return None
-        return User.from_raw_data(data["data"]["user"]["result"])
+        return User.from_raw_data(
+            data["data"]["user"]["result"], raw_data=self.raw_data_policy
+        )
 
-    async def request_user_by_username(self, username: str) -> User | Account | None:
+    async def request_user_by_username(
+        self, username: str, *, use_cache: bool = True
+    ) -> User | Account | None:
         """
         :param username: Имя пользователя без знака `@`
+        :param use_cache: Брать пользователя из кеша, если он там есть.
         :return: Пользователь, если существует, иначе None. Или собственный аккаунт, если совпадает имя пользователя.
         """
         if not self.account.username:
-            await self.update_account_info()
+            await self.ensure_account_info()
 
-        user = await self._request_user_by_username(username)
+        user = None
+        if use_cache and self.cache is not None:
+            user = self.cache.get_user_by_username(username)
+
+        if user is None:
+            user = await self._request_user_by_username(username)
+            if user and self.cache is not None:
+                self.cache.set_user(user)
 
         if user and user.username == self.account.username:
-            self.account.update(**user.model_dump())
+            account_info = user.model_dump(
+                include=_ACCOUNT_INFO_FIELDS, exclude_defaults=True
+            )
+            self._update_account("account_info", **account_info)
             return self.account
 
         return user
@@ -497,21 +778,29 @@ class Client(BaseHTTPClient):
     async def _request_users_by_ids(
         self, user_ids: Iterable[str | int]
     ) -> dict[int : User | Account]:
-        url, query_id = self._action_to_url("UsersByRestIds")
-        variables = {"userIds": list({str(user_id) for user_id in user_ids})}
-        features = {
-            "responsive_web_graphql_exclude_directive_enabled": True,
-            "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-            "responsive_web_graphql_timeline_navigation_enabled": True,
-            "verified_phone_label_enabled": False,
-        }
-        query = {"variables": variables, "features": features}
-        response, data = await self.request("GET", url, params=query)
+        """
+        Один запрос UsersByRestIds. Не больше _USERS_BY_IDS_BATCH_SIZE ID за раз.
+
+        :return: Найденные пользователи.
+        """
+        user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        key = self._inflight.key("UsersByRestIds", {"userIds": sorted(user_ids)})
+        return await self._inflight.do(key, lambda: self._fetch_users_by_ids(user_ids))
+
+    async def _fetch_users_by_ids(
+        self, user_ids: list[str]
+    ) -> dict[int : User | Account]:
+        response, data = await self._graphql_request(
+            "UsersByRestIds", {"userIds": user_ids}
+        )
 
         users = {}
         for user_data in data["data"]["users"]:
-            user_data = user_data["result"]
-            user = User.from_raw_data(user_data)
+            user_data = user_data.get("result", {})
+            # Удаленные и приостановленные пользователи приходят без данных
+            if "legacy" not in user_data:
+                continue
+            user = User.from_raw_data(user_data, raw_data=self.raw_data_policy)
             users[user.id] = user
             if user.id == self.account.id:
                 users[self.account.id] = self.account
@@ -522,27 +811,289 @@ class Client(BaseHTTPClient):
         :param user_id: ID пользователя
         :return: Пользователь, если существует, иначе None. Или собственный аккаунт, если совпадает ID.
         """
-        if not self.account.id:
-            await self.update_account_info()
+        await self.ensure_account_info()
+
+        if self.cache is not None:
+            if user := self.cache.get_user(user_id):
+                return user
 
         users = await self._request_users_by_ids((user_id,))
-        user = users[user_id]
-        return user
+        self._cache_users(users.values())
+        return users.get(int(user_id))
 
     async def request_users_by_ids(
-        self, user_ids: Iterable[str | int]
-    ) -> dict[int : User | Account]:
+        self,
+        user_ids: Iterable[str | int],
+        *,
+        batch_size: int = None,
+        concurrency: int = 5,
+    ) -> dict[int : User | Account | None]:
         """
+        Запрашивает пользователей пачками, несколько пачек одновременно.
+
         :param user_ids: ID пользователей
-        :return: Пользователи, если существует, иначе None. Или собственный аккаунт, если совпадает ID.
+        :param batch_size: Количество ID в одном запросе. Не больше _USERS_BY_IDS_BATCH_SIZE.
+        :param concurrency: Количество одновременных запросов.
+        :return: Пользователи в порядке переданных ID. Для несуществующих, удаленных и приостановленных пользователей None.
+            Или собственный аккаунт, если совпадает ID.
         """
-        return await self._request_users_by_ids(user_ids)
+        batch_size = min(
+            batch_size or self._USERS_BY_IDS_BATCH_SIZE, self._USERS_BY_IDS_BATCH_SIZE
+        )
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+
+        found = {}
+        if self.cache is not None:
+            for user_id in user_ids:
+                if user := self.cache.get_user(user_id):
+                    found[user_id] = user
+
+        user_ids_to_request = [user_id for user_id in user_ids if user_id not in found]
+        batches = [
+            user_ids_to_request[i : i + batch_size]
+            for i in range(0, len(user_ids_to_request), batch_size)
+        ]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request_batch(batch: list[int]) -> dict[int : User | Account]:
+            async with semaphore:
+                return await self._request_users_by_ids(batch)
+
+        for users in await asyncio.gather(*map(request_batch, batches)):
+            self._cache_users(users.values())
+            found.update(users)
+
+        users = {user_id: found.get(user_id) for user_id in user_ids}
+        if missing := len(users) - len(found):
+            logger.debug(
+                f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
+                f" {missing}/{len(users)} users not found or suspended"
+            )
+        return users
+
+    def _cache_users(self, users: Iterable[User | Account]):
+        if self.cache is None:
+            return
+
+        for user in users:
+            # Собственный аккаунт обновляется клиентом, его не нужно кешировать
+            if user is not self.account:
+                self.cache.set_user(user)
+
+    def _invalidate_account_cache(self):
+        if self.cache is not None:
+            self.cache.invalidate_user(self.account.id, self.account.username)
 
     async def update_account_info(self):
         if not self.account.username:
             await self._update_account_username()
 
-        await self.request_user_by_username(self.account.username)
+        await self.request_user_by_username(self.account.username, use_cache=False)
+        self._update_account("account_info", info_updated_at=datetime.now())
+
+    async def ensure_account_info(self, *, force: bool = False):
+        """
+        Запрашивает информацию об аккаунте, если ее еще нет.
+        Одновременные вызовы ждут один общий запрос.
+
+        :param force: Запросить информацию, даже если она уже есть.
+        """
+        if not force and self.account.id and self.account.username:
+            return
+
+        await self._inflight.do(("update_account_info",), self.update_account_info)
+
+    async def _media_upload_command(
+        self,
+        command: str,
+        params: dict,
+        *,
+        method: str = "POST",
+        **request_kwargs,
+    ) -> Any:
+        # Повтор команды не создает дубликатов: часть перезаписывается по segment_index,
+        # а повторный INIT оставляет лишь неиспользуемый media_id
+        params = {"command": command, **params}
+        response, data = await self.request(
+            method,
+            self._MEDIA_UPLOAD_URL,
+            params=params,
+            idempotent=True,
+            **request_kwargs,
+        )
+        return data
+
+    async def _append_media_segment(
+        self,
+        media_id: int,
+        segment_index: int,
+        segment: bytes,
+        **request_kwargs,
+    ):
+        multipart = CurlMime()
+        multipart.addpart(
+            name="media",
+            content_type="application/octet-stream",
+            filename="blob",
+            data=segment,
+        )
+        try:
+            params = {"media_id": media_id, "segment_index": segment_index}
+            await self._media_upload_command(
+                "APPEND", params, multipart=multipart, **request_kwargs
+            )
+        finally:
+            multipart.close()
+
+    async def _wait_for_media_processing(
+        self, media_data: dict, **request_kwargs
+    ) -> Media:
+        media = Media(**media_data)
+        while media.processing_info and media.processing_info.state in (
+            "pending",
+            "in_progress",
+        ):
+            await asyncio.sleep(media.processing_info.check_after_secs or 1)
+            status_data = await self._media_upload_command(
+                "STATUS", {"media_id": media.id}, method="GET", **request_kwargs
+            )
+            # expires_at остается от FINALIZE: STATUS отсчитывал бы expires_after_secs заново
+            processing_info = status_data.get("processing_info")
+            media.processing_info = (
+                ProcessingInfo(**processing_info) if processing_info else None
+            )
+
+        if media.processing_info and media.processing_info.state == "failed":
+            raise MediaProcessingFailed(media.id, media.processing_info.error)
+        return media
+
+    async def upload_media(
+        self,
+        media: MediaSource,
+        *,
+        media_type: str = None,
+        media_category: str = None,
+        total_bytes: int = None,
+        segment_size: int = SEGMENT_SIZE,
+        concurrency: int = 1,
+        checkpoint: Path | str = None,
+        timeout: float | tuple[float, float] = 30,
+        retry_policy: RetryPolicy = None,
+        wait_for_processing: bool = True,
+        use_cache: bool = True,
+    ) -> Media:
+        """
+        Загружает изображение, GIF или видео по частям (INIT, APPEND, FINALIZE).
+        Данные не кодируются в base64 и не загружаются в память целиком:
+        при ошибке повторяется только отправка одной части.
+
+        :param media: Байты, путь до файла или асинхронный итератор байтов.
+        :param media_type: MIME тип. По умолчанию определяется по содержимому.
+        :param media_category: tweet_image, tweet_gif, tweet_video и т.п. По умолчанию определяется по MIME типу.
+        :param total_bytes: Размер. Обязателен для асинхронного итератора.
+        :param segment_size: Размер одной части (не больше 5 MB).
+        :param concurrency: Количество частей, отправляемых одновременно.
+        :param checkpoint: Путь до файла с состоянием загрузки. Если загрузка прервется,
+            повторный вызов с тем же файлом продолжит ее с незагруженных частей,
+            если содержимое не изменилось. Файл удаляется после успешной загрузки.
+        :param timeout: Таймаут каждого запроса.
+        :param retry_policy: Политика повторных запросов для каждого запроса.
+        :param wait_for_processing: Дождаться окончания обработки (для GIF и видео).
+        :param use_cache: Вернуть ранее загруженное медиа с тем же содержимым из media_cache, если оно еще действует.
+        :return: Media
+        """
+        total_bytes, media_type = describe_media(
+            media, media_type=media_type, total_bytes=total_bytes
+        )
+        media_category = media_category or guess_media_category(media_type)
+        request_kwargs = {"timeout": timeout, "retry_policy": retry_policy}
+
+        use_cache = use_cache and self.media_cache is not None
+        digest = None
+        if use_cache or checkpoint:
+            # Хеширование большого файла не должно блокировать event loop
+            digest = await asyncio.to_thread(media_digest, media)
+
+        cache_key = None
+        if use_cache and digest:
+            cache_key = f"{digest}:{media_category or ''}"
+            if cached_media := self.media_cache.get(cache_key):
+                return cached_media
+
+        state = UploadCheckpoint.load(checkpoint) if checkpoint else None
+        if state is None or not state.matches(
+            total_bytes, media_type, segment_size, digest
+        ):
+            params = {"total_bytes": total_bytes, "media_type": media_type}
+            if media_category:
+                params["media_category"] = media_category
+            data = await self._media_upload_command("INIT", params, **request_kwargs)
+            state = UploadCheckpoint(
+                media_id=int(data["media_id"]),
+                total_bytes=total_bytes,
+                media_type=media_type,
+                segment_size=segment_size,
+                expires_at=datetime.now().timestamp() + data["expires_after_secs"],
+                digest=digest,
+            )
+            if checkpoint:
+                state.save(checkpoint)
+        else:
+            logger.info(
+                f"(auth_token={self.account.hidden_auth_token}, id={self.account.id}, username={self.account.username})"
+                f" Resuming upload of media {state.media_id}:"
+                f" {len(state.segments_done)} segments already uploaded"
+            )
+        media_id = state.media_id
+
+        async def append(segment_index: int, segment: bytes):
+            await self._append_media_segment(
+                media_id, segment_index, segment, **request_kwargs
+            )
+            state.segments_done.add(segment_index)
+            if checkpoint:
+                state.save(checkpoint)
+
+        # Не больше concurrency частей в полете и в памяти одновременно
+        pending = set()
+        segments = iter_segments(media, segment_size, skip=state.segments_done)
+        try:
+            async with aclosing(segments):
+                async for segment_index, segment in segments:
+                    if len(pending) >= concurrency:
+                        done, pending = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        for task in done:
+                            task.result()
+                    pending.add(asyncio.create_task(append(segment_index, segment)))
+
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                for task in done:
+                    task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        data = await self._media_upload_command(
+            "FINALIZE", {"media_id": media_id}, **request_kwargs
+        )
+        if checkpoint:
+            Path(checkpoint).unlink(missing_ok=True)
+
+        if wait_for_processing:
+            media = await self._wait_for_media_processing(data, **request_kwargs)
+        else:
+            media = Media(**data)
+
+        processing = (
+            media.processing_info and media.processing_info.state != "succeeded"
+        )
+        if cache_key and not processing:
+            self.media_cache.set(cache_key, media)
+        return media
 
     async def upload_image(
         self,
@@ -554,33 +1105,22 @@ class Client(BaseHTTPClient):
         Upload image as bytes.
 
         Иногда при первой попытке загрузки изображения возвращает 408,
-        после чего повторная попытка загрузки изображения проходит успешно
+        после чего повторная попытка загрузки изображения проходит успешно.
+        Изображение загружается по частям (см. upload_media), поэтому повторяется только часть.
 
         :return: Media
         """
-        url = "https://upload.x.com/1.1/media/upload.json"
-        payload = {"media_data": base64.b64encode(image)}
-        for attempt in range(attempts):
-            try:
-                response, data = await self.request(
-                    "POST", url, data=payload, timeout=timeout
-                )
-                return Media(**data)
-            except (HTTPException, requests.errors.RequestsError) as exc:
-                if (
-                    attempt < attempts - 1
-                    and (
-                        isinstance(exc, requests.errors.RequestsError)
-                        and exc.code == 28
-                    )
-                    or (
-                        isinstance(exc, HTTPException)
-                        and exc.response.status_code == 408
-                    )
-                ):
-                    continue
-                else:
-                    raise
+        retry_policy = RetryPolicy(
+            {
+                requests.errors.RequestsError: attempts - 1,
+                HTTPException: attempts - 1,
+            },
+            max_attempts=attempts,
+            backoff=0,
+        )
+        return await self.upload_media(
+            image, timeout=timeout, retry_policy=retry_policy
+        )
 
     async def _follow_action(self, action: str, user_id: int | str) -> bool:
         url = f"https://x.com/i/api/1.1/friendships/{action}.json"
@@ -603,9 +1143,15 @@ class Client(BaseHTTPClient):
         headers = {
             "content-type": "application/x-www-form-urlencoded",
         }
-        response, response_json = await self.request(
-            "POST", url, params=params, headers=headers
-        )
+        # Кеш сбрасывается после запроса: иначе одновременный запрос пользователя
+        # успел бы снова закешировать его старое состояние
+        try:
+            response, response_json = await self.request(
+                "POST", url, params=params, headers=headers
+            )
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate_user(user_id)
         return bool(response_json)
 
     async def follow(self, user_id: str | int) -> bool:
@@ -615,12 +1161,11 @@ class Client(BaseHTTPClient):
         return await self._follow_action("destroy", user_id)
 
     async def _interact_with_tweet(self, action: str, tweet_id: int) -> dict:
-        url, query_id = self._action_to_url(action)
-        json_payload = {
-            "variables": {"tweet_id": tweet_id, "dark_request": False},
-            "queryId": query_id,
-        }
-        response, data = await self.request("POST", url, json=json_payload)
+        try:
+            response, data = await self._graphql_request(action, {"tweet_id": tweet_id})
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate_tweet(tweet_id)
         return data
 
     async def _repost(self, tweet_id: int | str) -> Tweet:
@@ -700,15 +1245,13 @@ class Client(BaseHTTPClient):
         return is_unliked
 
     async def delete_tweet(self, tweet_id: int | str) -> bool:
-        url, query_id = self._action_to_url("DeleteTweet")
-        json_payload = {
-            "variables": {
-                "tweet_id": tweet_id,
-                "dark_request": False,
-            },
-            "queryId": query_id,
-        }
-        response, response_json = await self.request("POST", url, json=json_payload)
+        try:
+            response, response_json = await self._graphql_request(
+                "DeleteTweet", {"tweet_id": tweet_id}
+            )
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate_tweet(tweet_id)
         is_deleted = "data" in response_json and "delete_tweet" in response_json["data"]
         return is_deleted
 
@@ -731,16 +1274,13 @@ class Client(BaseHTTPClient):
         self,
         text: str = None,
         *,
-        media_id: int | str = None,
+        media_ids: Sequence[int | str] = (),
         tweet_id_to_reply: str | int = None,
         attachment_url: str = None,
     ) -> Tweet:
-        url, query_id = self._action_to_url("CreateTweet")
         variables = {
             "tweet_text": text if text is not None else "",
-            "dark_request": False,
             "media": {"media_entities": [], "possibly_sensitive": False},
-            "semantic_annotation_ids": [],
         }
         if attachment_url:
             variables["attachment_url"] = attachment_url
@@ -749,59 +1289,65 @@ class Client(BaseHTTPClient):
                 "in_reply_to_tweet_id": str(tweet_id_to_reply),
                 "exclude_reply_user_ids": [],
             }
-        if media_id:
-            variables["media"]["media_entities"].append(
-                {"media_id": str(media_id), "tagged_users": []}
-            )
-        features = {
-            "communities_web_enable_tweet_community_results_fetch": True,
-            "c9s_tweet_anatomy_moderator_badge_enabled": True,
-            "tweetypie_unmention_optimization_enabled": True,
-            "responsive_web_edit_tweet_api_enabled": True,
-            "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
-            "view_counts_everywhere_api_enabled": True,
-            "longform_notetweets_consumption_enabled": True,
-            "responsive_web_twitter_article_tweet_consumption_enabled": True,
-            "tweet_awards_web_tipping_enabled": False,
-            "creator_subscriptions_quote_tweet_preview_enabled": False,
-            "longform_notetweets_rich_text_read_enabled": True,
-            "longform_notetweets_inline_media_enabled": True,
-            "articles_preview_enabled": True,
-            "rweb_video_timestamps_enabled": True,
-            "rweb_tipjar_consumption_enabled": True,
-            "responsive_web_graphql_exclude_directive_enabled": True,
-            "verified_phone_label_enabled": False,
-            "freedom_of_speech_not_reach_fetch_enabled": True,
-            "standardized_nudges_misinfo": True,
-            "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
-            "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-            "responsive_web_graphql_timeline_navigation_enabled": True,
-            "responsive_web_enhance_cards_enabled": False,
-        }
-        payload = {
-            "variables": variables,
-            "features": features,
-            "queryId": query_id,
-        }
-        response, response_json = await self.request("POST", url, json=payload)
+        for media_id in media_ids:
+            variables["media"]["media_entities"].append(
+                {"media_id": str(media_id), "tagged_users": []}
+            )
+        response, response_json = await self._graphql_request("CreateTweet", variables)
         tweet = Tweet.from_raw_data(
-            response_json["data"]["create_tweet"]["tweet_results"]["result"]
+            response_json["data"]["create_tweet"]["tweet_results"]["result"],
+            raw_data=self.raw_data_policy,
         )
         return tweet
 
+    async def _upload_tweet_media(
+        self, media_id: int | str = None, media: Sequence[TweetMedia] = ()
+    ) -> list[int | str]:
+        """
+        Одновременно загружает байты и файлы из media.
+        media_id передается как есть.
+
+        :return: media_id в исходном порядке.
+        """
+        items = ([media_id] if media_id else []) + list(media or ())
+        if len(items) > self._MAX_TWEET_MEDIA:
+            raise ValueError(
+                f"A tweet can have at most {self._MAX_TWEET_MEDIA} media, got {len(items)}"
+            )
+
+        async def resolve(item: TweetMedia) -> int | str:
+            if isinstance(item, Media):
+                return item.id
+            if isinstance(item, int) or (isinstance(item, str) and item.isdigit()):
+                return item
+            # Несуществующий путь вызовет FileNotFoundError, а не уйдет в твит как media_id
+            return (await self.upload_media(item)).id
+
+        # При ошибке одной загрузки остальные отменяются, а не продолжаются в фоне
+        tasks = [asyncio.create_task(resolve(item)) for item in media or ()]
+        try:
+            media_ids = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return ([media_id] if media_id else []) + list(media_ids)
+
     async def _tweet_or_search_duplicate(
         self,
         text: str = None,
         *,
         media_id: int | str = None,
+        media: Sequence[TweetMedia] = (),
         tweet_id_to_reply: str | int = None,
         attachment_url: str = None,
         search_duplicate: bool = True,
     ) -> Tweet:
+        media_ids = await self._upload_tweet_media(media_id, media)
         try:
             tweet = await self._tweet(
                 text,
-                media_id=media_id,
+                media_ids=media_ids,
                 tweet_id_to_reply=tweet_id_to_reply,
                 attachment_url=attachment_url,
             )
@@ -832,16 +1378,19 @@ class Client(BaseHTTPClient):
         text: str,
         *,
         media_id: int | str = None,
+        media: Sequence[TweetMedia] = (),
         search_duplicate: bool = True,
     ) -> Tweet:
         """
         Иногда может вернуть ошибку 404 (Not Found), если плохой прокси или по другим неизвестным причинам
 
+        :param media: До 4 медиа: байты или пути до файлов (загружаются одновременно), Media или media_id.
         :return: Tweet
         """
         return await self._tweet_or_search_duplicate(
             text,
             media_id=media_id,
+            media=media,
             search_duplicate=search_duplicate,
         )
 
@@ -851,16 +1400,19 @@ class Client(BaseHTTPClient):
         text: str,
         *,
         media_id: int | str = None,
+        media: Sequence[TweetMedia] = (),
         search_duplicate: bool = True,
     ) -> Tweet:
         """
         Иногда может вернуть ошибку 404 (Not Found), если плохой прокси или по другим неизвестным причинам
 
+        :param media: До 4 медиа: байты или пути до файлов (загружаются одновременно), Media или media_id.
         :return: Tweet
         """
         return await self._tweet_or_search_duplicate(
             text,
             media_id=media_id,
+            media=media,
             tweet_id_to_reply=tweet_id,
             search_duplicate=search_duplicate,
         )
@@ -871,16 +1423,19 @@ class Client(BaseHTTPClient):
         text: str,
         *,
         media_id: int | str = None,
+        media: Sequence[TweetMedia] = (),
         search_duplicate: bool = True,
     ) -> Tweet:
         """
         Иногда может вернуть ошибку 404 (Not Found), если плохой прокси или по другим неизвестным причинам
 
+        :param media: До 4 медиа: байты или пути до файлов (загружаются одновременно), Media или media_id.
         :return: Tweet
         """
         return await self._tweet_or_search_duplicate(
             text,
             media_id=media_id,
+            media=media,
             attachment_url=tweet_url,
             search_duplicate=search_duplicate,
         )
@@ -908,197 +1463,280 @@ class Client(BaseHTTPClient):
         user_id: int | str,
         count: int,
         cursor: str = None,
-    ) -> list[User]:
-        url, query_id = self._action_to_url(action)
-        variables = {
-            "userId": str(user_id),
-            "count": count,
-            "includePromotedContent": False,
-        }
+        raw_data: RawDataPolicy = None,
+    ) -> tuple[list[User], str | None]:
+        """
+        :return: Пользователи и курсор следующей страницы.
+        """
+        variables = {"userId": str(user_id), "count": count}
         if cursor:
             variables["cursor"] = cursor
-        features = {
-            "rweb_lists_timeline_redesign_enabled": True,
-            "responsive_web_graphql_exclude_directive_enabled": True,
-            "verified_phone_label_enabled": False,
-            "creator_subscriptions_tweet_preview_api_enabled": True,
-            "responsive_web_graphql_timeline_navigation_enabled": True,
-            "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-            "tweetypie_unmention_optimization_enabled": True,
-            "responsive_web_edit_tweet_api_enabled": True,
-            "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
-            "view_counts_everywhere_api_enabled": True,
-            "longform_notetweets_consumption_enabled": True,
-            "responsive_web_twitter_article_tweet_consumption_enabled": False,
-            "tweet_awards_web_tipping_enabled": False,
-            "freedom_of_speech_not_reach_fetch_enabled": True,
-            "standardized_nudges_misinfo": True,
-            "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
-            "longform_notetweets_rich_text_read_enabled": True,
-            "longform_notetweets_inline_media_enabled": True,
-            "responsive_web_media_download_video_enabled": False,
-            "responsive_web_enhance_cards_enabled": False,
-        }
-        params = {
-            "variables": variables,
-            "features": features,
-        }
-        response, response_json = await self.request("GET", url, params=params)
+        response, response_json = await self._graphql_request(action, variables)
 
-        users = []
-        if "result" in response_json["data"]["user"]:
-            entries = response_json["data"]["user"]["result"]["timeline"]["timeline"][
-                "instructions"
-            ][-1]["entries"]
-            for entry in entries:
-                if entry["entryId"].startswith("user"):
-                    user_data_dict = entry["content"]["itemContent"]["user_results"][
-                        "result"
-                    ]
-                    users.append(User.from_raw_data(user_data_dict))
-        return users
+        if "result" not in response_json["data"]["user"]:
+            return [], None
+
+        instructions = response_json["data"]["user"]["result"]["timeline"]["timeline"][
+            "instructions"
+        ]
+        if raw_data is None:
+            raw_data = self.raw_data_policy
+        users_data = users_data_from_instructions(
+            instructions, include_unavailable=True
+        )
+        users = [
+            User.from_raw_data(user_data, raw_data=raw_data)
+            for user_data in users_data
+            if "legacy" in user_data
+        ]
+        # Страница только из недоступных пользователей - еще не конец списка
+        next_cursor = cursor_from_instructions(instructions) if users_data else None
+        return users, next_cursor
+
+    async def _iter_users_by_action(
+        self,
+        action: str,
+        user_id: int | str = None,
+        page_size: int = 20,
+        limit: int = None,
+        cursor: str = None,
+        prefetch: int = 0,
+        raw_data: RawDataPolicy = None,
+    ) -> AsyncIterator[User]:
+        if not user_id:
+            await self.ensure_account_info()
+            user_id = self.account.id
+
+        async def fetch_page(page_cursor: str | None):
+            return await self._request_users_by_action(
+                action, user_id, page_size, page_cursor, raw_data
+            )
+
+        count = 0
+        pages = paginate(fetch_page, cursor=cursor, prefetch=prefetch)
+        async with aclosing(pages):
+            async for users in pages:
+                for user in users:
+                    yield user
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
 
     async def request_followers(
         self,
         user_id: int | str = None,
         count: int = 20,
         cursor: str = None,
+        raw_data: RawDataPolicy = None,
     ) -> list[User]:
         """
         :param user_id: Текущий пользователь, если не передан ID иного пользователя.
         :param count: Количество подписчиков.
+        :param raw_data: Какие исходные данные хранить в User.raw_data. По умолчанию как у клиента.
         """
-        if user_id:
-            return await self._request_users_by_action(
-                "Followers", user_id, count, cursor
-            )
-        else:
-            if not self.account.id:
-                await self.update_account_info()
-            return await self._request_users_by_action(
-                "Followers", self.account.id, count, cursor
-            )
+        if not user_id:
+            await self.ensure_account_info()
+            user_id = self.account.id
+
+        users, _ = await self._request_users_by_action(
+            "Followers", user_id, count, cursor, raw_data
+        )
+        return users
 
     async def request_followings(
         self,
         user_id: int | str = None,
         count: int = 20,
         cursor: str = None,
+        raw_data: RawDataPolicy = None,
     ) -> list[User]:
         """
         :param user_id: Текущий пользователь, если не передан ID иного пользователя.
         :param count: Количество подписчиков.
+        :param raw_data: Какие исходные данные хранить в User.raw_data. По умолчанию как у клиента.
         """
-        if user_id:
-            return await self._request_users_by_action(
-                "Following", user_id, count, cursor
-            )
-        else:
-            if not self.account.id:
-                await self.update_account_info()
-            return await self._request_users_by_action(
-                "Following", self.account.id, count, cursor
-            )
+        if not user_id:
+            await self.ensure_account_info()
+            user_id = self.account.id
+
+        users, _ = await self._request_users_by_action(
+            "Following", user_id, count, cursor, raw_data
+        )
+        return users
+
+    def iter_followers(
+        self,
+        user_id: int | str = None,
+        page_size: int = 20,
+        limit: int = None,
+        cursor: str = None,
+        prefetch: int = 0,
+        raw_data: RawDataPolicy = None,
+    ) -> AsyncIterator[User]:
+        """
+        Постранично запрашивает подписчиков.
+
+        :param user_id: Текущий пользователь, если не передан ID иного пользователя.
+        :param page_size: Количество подписчиков на странице.
+        :param limit: Максимальное количество подписчиков.
+        :param cursor: Курсор, с которого начинать.
+        :param prefetch: Количество страниц, которые запрашиваются заранее.
+        :param raw_data: Какие исходные данные хранить в User.raw_data. По умолчанию как у клиента.
+        """
+        return self._iter_users_by_action(
+            "Followers", user_id, page_size, limit, cursor, prefetch, raw_data
+        )
+
+    def iter_followings(
+        self,
+        user_id: int | str = None,
+        page_size: int = 20,
+        limit: int = None,
+        cursor: str = None,
+        prefetch: int = 0,
+        raw_data: RawDataPolicy = None,
+    ) -> AsyncIterator[User]:
+        """
+        Постранично запрашивает подписки.
+
+        :param user_id: Текущий пользователь, если не передан ID иного пользователя.
+        :param page_size: Количество подписок на странице.
+        :param limit: Максимальное количество подписок.
+        :param cursor: Курсор, с которого начинать.
+        :param prefetch: Количество страниц, которые запрашиваются заранее.
+        :param raw_data: Какие исходные данные хранить в User.raw_data. По умолчанию как у клиента.
+        """
+        return self._iter_users_by_action(
+            "Following", user_id, page_size, limit, cursor, prefetch, raw_data
+        )
 
     async def _request_tweet(self, tweet_id: int | str) -> Tweet:
-        url, query_id = self._action_to_url("TweetDetail")
-        variables = {
-            "focalTweetId": str(tweet_id),
-            "with_rux_injections": False,
-            "includePromotedContent": True,
-            "withCommunity": True,
-            "withQuickPromoteEligibilityTweetFields": True,
-            "withBirdwatchNotes": True,
-            "withVoice": True,
-            "withV2Timeline": True,
-        }
-        features = {
-            "rweb_lists_timeline_redesign_enabled": True,
-            "responsive_web_graphql_exclude_directive_enabled": True,
-            "verified_phone_label_enabled": False,
-            "creator_subscriptions_tweet_preview_api_enabled": True,
-            "responsive_web_graphql_timeline_navigation_enabled": True,
-            "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-            "tweetypie_unmention_optimization_enabled": True,
-            "responsive_web_edit_tweet_api_enabled": True,
-            "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
-            "view_counts_everywhere_api_enabled": True,
-            "longform_notetweets_consumption_enabled": True,
-            "tweet_awards_web_tipping_enabled": False,
-            "freedom_of_speech_not_reach_fetch_enabled": True,
-            "standardized_nudges_misinfo": True,
-            "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
-            "longform_notetweets_rich_text_read_enabled": True,
-            "longform_notetweets_inline_media_enabled": True,
-            "responsive_web_enhance_cards_enabled": False,
-        }
-        query = {
-            "variables": variables,
-            "features": features,
-        }
-        response, data = await self.request("GET", url, params=query)
+        key = self._inflight.key("TweetDetail", {"focalTweetId": str(tweet_id)})
+        return await self._inflight.do(key, lambda: self._fetch_tweet(tweet_id))
+
+    async def _fetch_tweet(self, tweet_id: int | str) -> Tweet:
+        response, data = await self._graphql_request(
+            "TweetDetail", {"focalTweetId": str(tweet_id)}
+        )
         instructions = data["data"]["threaded_conversation_with_injections_v2"]["instructions"]  # type: ignore
         tweet_data = tweets_data_from_instructions(instructions)[0]
-        return Tweet.from_raw_data(tweet_data)
+        return Tweet.from_raw_data(tweet_data, raw_data=self.raw_data_policy)
 
     async def _request_tweets(
-        self, user_id: int | str, count: int = 20, cursor: str = None
-    ) -> list[Tweet]:
-        url, query_id = self._action_to_url("UserTweets")
-        variables = {
-            "userId": str(user_id),
-            "count": count,
-            "includePromotedContent": True,
-            "withQuickPromoteEligibilityTweetFields": True,
-            "withVoice": True,
-            "withV2Timeline": True,
-        }
+        self,
+        user_id: int | str,
+        count: int = 20,
+        cursor: str = None,
+        *,
+        raw_data: RawDataPolicy = None,
+        users: dict[int, User] = None,
+    ) -> tuple[list[Tweet], str | None]:
+        """
+        :param users: Общие для всех твитов авторы, см. Tweet.from_raw_data.
+        :return: Твиты и курсор следующей страницы.
+        """
+        variables = {"userId": str(user_id), "count": count}
         if cursor:
             variables["cursor"] = cursor
-        features = {
-            "responsive_web_graphql_exclude_directive_enabled": True,
-            "verified_phone_label_enabled": False,
-            "creator_subscriptions_tweet_preview_api_enabled": True,
-            "responsive_web_graphql_timeline_navigation_enabled": True,
-            "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-            "c9s_tweet_anatomy_moderator_badge_enabled": True,
-            "tweetypie_unmention_optimization_enabled": True,
-            "responsive_web_edit_tweet_api_enabled": True,
-            "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
-            "view_counts_everywhere_api_enabled": True,
-            "longform_notetweets_consumption_enabled": True,
-            "responsive_web_twitter_article_tweet_consumption_enabled": False,
-            "tweet_awards_web_tipping_enabled": False,
-            "freedom_of_speech_not_reach_fetch_enabled": True,
-            "standardized_nudges_misinfo": True,
-            "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
-            "rweb_video_timestamps_enabled": True,
-            "longform_notetweets_rich_text_read_enabled": True,
-            "longform_notetweets_inline_media_enabled": True,
-            "responsive_web_media_download_video_enabled": False,
-            "responsive_web_enhance_cards_enabled": False,
-        }
-        params = {"variables": variables, "features": features}
-        response, data = await self.request("GET", url, params=params)
+        response, data = await self._graphql_request("UserTweets", variables)
 
         instructions = data["data"]["user"]["result"]["timeline_v2"]["timeline"][
             "instructions"
         ]
-        tweets_data = tweets_data_from_instructions(instructions)
-        return [Tweet.from_raw_data(tweet_data) for tweet_data in tweets_data]
+        if raw_data is None:
+            raw_data = self.raw_data_policy
+        if users is None:
+            users = {}
+        tweets = [
+            Tweet.from_raw_data(tweet_data, raw_data=raw_data, users=users)
+            for tweet_data in tweets_data_from_instructions(instructions)
+        ]
+        next_cursor = cursor_from_instructions(instructions) if tweets else None
+        return tweets, next_cursor
 
     async def request_tweet(self, tweet_id: int | str) -> Tweet:
-        return await self._request_tweet(tweet_id)
+        if self.cache is not None:
+            if tweet := self.cache.get_tweet(tweet_id):
+                return tweet
+
+        tweet = await self._request_tweet(tweet_id)
+        if self.cache is not None:
+            self.cache.set_tweet(tweet)
+        return tweet
 
     async def request_tweets(
-        self, user_id: int | str = None, count: int = 20, cursor: str = None
+        self,
+        user_id: int | str = None,
+        count: int = 20,
+        cursor: str = None,
+        *,
+        raw_data: RawDataPolicy = None,
     ) -> list[Tweet]:
+        """
+        :param raw_data: Какие исходные данные хранить в raw_data. По умолчанию как у клиента.
+        """
+        if not user_id:
+            await self.ensure_account_info()
+            user_id = self.account.id
+
+        tweets, _ = await self._request_tweets(
+            user_id, count, cursor, raw_data=raw_data
+        )
+        return tweets
+
+    async def iter_user_tweets(
+        self,
+        user_id: int | str = None,
+        *,
+        since_id: int | str = None,
+        until_id: int | str = None,
+        max_pages: int = None,
+        page_size: int = 20,
+        cursor: str = None,
+        prefetch: int = 0,
+        raw_data: RawDataPolicy = None,
+    ) -> AsyncIterator[Tweet]:
+        """
+        Постранично запрашивает твиты пользователя, начиная с самых новых.
+
+        ID твитов (snowflake) растут со временем, поэтому запрос страниц прекращается,
+        как только встречается твит не новее since_id.
+
+        :param user_id: Текущий пользователь, если не передан ID иного пользователя.
+        :param since_id: Только твиты новее твита с этим ID.
+        :param until_id: Только твиты старше твита с этим ID.
+        :param max_pages: Максимальное количество страниц.
+        :param page_size: Количество твитов на странице.
+        :param cursor: Курсор, с которого начинать.
+        :param prefetch: Количество страниц, которые запрашиваются заранее.
+        :param raw_data: Какие исходные данные хранить в raw_data. По умолчанию как у клиента.
+        """
         if not user_id:
-            if not self.account.id:
-                await self.update_account_info()
+            await self.ensure_account_info()
             user_id = self.account.id
 
-        return await self._request_tweets(user_id, count, cursor)
+        since_id = int(since_id) if since_id is not None else None
+        until_id = int(until_id) if until_id is not None else None
+
+        # Один автор на всех страницах хранится в памяти одним объектом
+        users = {}
+
+        async def fetch_page(page_cursor: str | None):
+            return await self._request_tweets(
+                user_id, page_size, page_cursor, raw_data=raw_data, users=users
+            )
+
+        pages = paginate(
+            fetch_page, cursor=cursor, max_pages=max_pages, prefetch=prefetch
+        )
+        async with aclosing(pages):
+            async for tweets in pages:
+                for tweet in tweets:
+                    if since_id is not None and tweet.id <= since_id:
+                        return
+                    if until_id is not None and tweet.id >= until_id:
+                        continue
+                    yield tweet
 
     async def _update_profile_image(
         self, type: Literal["banner", "image"], media_id: str | int
@@ -1124,7 +1762,10 @@ class Client(BaseHTTPClient):
             "skip_status": "1",
             "return_user": "true",
         }
-        response, data = await self.request("POST", url, params=params)
+        try:
+            response, data = await self.request("POST", url, params=params)
+        finally:
+            self._invalidate_account_cache()
         image_url = data[f"profile_{type}_url"]
         return image_url
 
@@ -1143,10 +1784,13 @@ class Client(BaseHTTPClient):
     async def change_username(self, username: str) -> bool:
         url = "https://x.com/i/api/1.1/account/settings.json"
         payload = {"screen_name": username}
-        response, data = await self.request("POST", url, data=payload)
+        try:
+            response, data = await self.request("POST", url, data=payload)
+        finally:
+            self._invalidate_account_cache()
         new_username = data["screen_name"]
         changed = new_username == username
-        self.account.username = new_username
+        self._update_account("username", username=new_username)
         return changed
 
     async def change_password(self, password: str) -> bool:
@@ -1164,7 +1808,7 @@ class Client(BaseHTTPClient):
         }
         response, data = await self.request("POST", url, data=payload)
         changed = data["status"] == "ok"
-        self.account.password = password
+        self._update_account("password", password=password)
         return changed
 
     async def update_profile(
@@ -1192,7 +1836,10 @@ class Client(BaseHTTPClient):
             ]
             if v is not None
         }
-        response, data = await self.request("POST", url, data=payload)
+        try:
+            response, data = await self.request("POST", url, data=payload)
+        finally:
+            self._invalidate_account_cache()
         # Проверяем, что все переданные параметры соответствуют полученным
         updated = all(
             data.get(key) == value for key, value in payload.items() if key != "url"
@@ -1208,9 +1855,10 @@ class Client(BaseHTTPClient):
         url = "https://api.x.com/1.1/account/personalization/p13n_preferences.json"
         try:
             await self.request("GET", url, auto_unlock=False, auto_relogin=False)
-            self.account.status = AccountStatus.GOOD
+            self._update_account("status", status=AccountStatus.GOOD)
         except BadAccount:
             pass
+        self._update_account("status", status_updated_at=datetime.now())
 
     async def update_birthdate(
         self,
@@ -1451,7 +2099,7 @@ class Client(BaseHTTPClient):
     async def update_backup_code(self):
         url = "https://api.x.com/1.1/account/backup_code.json"
         response, response_json = await self.request("GET", url)
-        self.account.backup_code = response_json["codes"][0]
+        self._update_account("backup_code", backup_code=response_json["codes"][0])
 
     async def _send_raw_subtask(self, **request_kwargs) -> tuple[str, list[Subtask]]:
         """
@@ -1632,26 +2280,7 @@ class Client(BaseHTTPClient):
         return await self._complete_subtask(flow_token, inputs, auth=False)
 
     async def _viewer(self):
-        url, query_id = self._action_to_url("Viewer")
-        features = {
-            "rweb_tipjar_consumption_enabled": True,
-            "responsive_web_graphql_exclude_directive_enabled": True,
-            "verified_phone_label_enabled": False,
-            "creator_subscriptions_tweet_preview_api_enabled": True,
-            "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-            "responsive_web_graphql_timeline_navigation_enabled": True,
-        }
-        field_toggles = {
-            "isDelegate": False,
-            "withAuxiliaryUserLabels": False,
-        }
-        variables = {"withCommunitiesMemberships": True}
-        params = {
-            "features": features,
-            "fieldToggles": field_toggles,
-            "variables": variables,
-        }
-        return await self.request("GET", url, params=params)
+        return await self._graphql_request("Viewer")
 
     async def _request_guest_token(self) -> str:
         """
@@ -1797,8 +2426,7 @@ class Client(BaseHTTPClient):
         await self.relogin()
 
     async def totp_is_enabled(self):
-        if not self.account.id:
-            await self.update_account_info()
+        await self.ensure_account_info()
 
         url = f"https://x.com/i/api/1.1/strato/column/User/{self.account.id}/account-security/twoFactorAuthSettings2"
         response, data = await self.request("GET", url)
@@ -1929,7 +2557,7 @@ class Client(BaseHTTPClient):
 
         for subtask in subtasks:
             if subtask.id == "TwoFactorEnrollmentAuthenticationAppPlainCodeSubtask":
-                self.account.totp_secret = subtask.raw_data["show_code"]["code"]
+                self._update_account("totp", totp_secret=subtask.raw_data["show_code"]["code"])
                 break
 
         flow_token, subtasks = await self._two_factor_enrollment_authentication_app_plain_code_subtask(flow_token)
@@ -1938,7 +2566,7 @@ class Client(BaseHTTPClient):
             if subtask.id == "TwoFactorEnrollmentAuthenticationAppCompleteSubtask":
                 result = re.search(r"\n[a-z0-9]{12}\n", subtask.raw_data["cta"]["secondary_text"]["text"])
                 backup_code = result[0].strip() if result else None
-                self.account.backup_code = backup_code
+                self._update_account("totp", backup_code=backup_code)
                 break
 
         # fmt: on
@@ -1955,7 +2583,6 @@ class Client(BaseHTTPClient):
 
 
 class GQLClient:
-    _GRAPHQL_URL = "https://x.com/i/api/graphql"
     _OPERATION_TO_QUERY_ID = {
         "CreateRetweet": "ojPdsZsimiJrUGLR1sjUtA",
         "FavoriteTweet": "lI07N6Otwv1PhnEgXILM7A",
@@ -1973,126 +2600,123 @@ class GQLClient:
         "UsersByRestIds": "itEhGywpgX9b3GJCzOtSrA",
         "Viewer": "-876iyxD1O_0X0BqeykjZA",
     }
-    _DEFAULT_VARIABLES = {
-        "count": 1000,
-        "withSafetyModeUserFields": True,
-        "includePromotedContent": True,
-        "withQuickPromoteEligibilityTweetFields": True,
-        "withVoice": True,
-        "withV2Timeline": True,
-        "withDownvotePerspective": False,
-        "withBirdwatchNotes": True,
-        "withCommunity": True,
-        "withSuperFollowsUserFields": True,
-        "withReactionsMetadata": False,
-        "withReactionsPerspective": False,
-        "withSuperFollowsTweetFields": True,
-        "isMetatagsQuery": False,
-        "withReplays": True,
-        "withClientEventToken": False,
-        "withAttachments": True,
-        "withConversationQueryHighlights": True,
-        "withMessageQueryHighlights": True,
-        "withMessages": True,
-    }
-    _DEFAULT_FEATURES = {
-        "c9s_tweet_anatomy_moderator_badge_enabled": True,
-        "responsive_web_home_pinned_timelines_enabled": True,
-        "blue_business_profile_image_shape_enabled": True,
-        "creator_subscriptions_tweet_preview_api_enabled": True,
-        "freedom_of_speech_not_reach_fetch_enabled": True,
-        "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
-        "graphql_timeline_v2_bookmark_timeline": True,
-        "hidden_profile_likes_enabled": True,
-        "highlights_tweets_tab_ui_enabled": True,
-        "interactive_text_enabled": True,
-        "longform_notetweets_consumption_enabled": True,
-        "longform_notetweets_inline_media_enabled": True,
-        "longform_notetweets_rich_text_read_enabled": True,
-        "longform_notetweets_richtext_consumption_enabled": True,
-        "profile_foundations_tweet_stats_enabled": True,
-        "profile_foundations_tweet_stats_tweet_frequency": True,
-        "responsive_web_birdwatch_note_limit_enabled": True,
-        "responsive_web_edit_tweet_api_enabled": True,
-        "responsive_web_enhance_cards_enabled": False,
-        "responsive_web_graphql_exclude_directive_enabled": True,
-        "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-        "responsive_web_graphql_timeline_navigation_enabled": True,
-        "responsive_web_media_download_video_enabled": False,
-        "responsive_web_text_conversations_enabled": False,
-        "responsive_web_twitter_article_data_v2_enabled": True,
-        "responsive_web_twitter_article_tweet_consumption_enabled": False,
-        "responsive_web_twitter_blue_verified_badge_is_enabled": True,
-        "rweb_lists_timeline_redesign_enabled": True,
-        "spaces_2022_h2_clipping": True,
-        "spaces_2022_h2_spaces_communities": True,
-        "standardized_nudges_misinfo": True,
-        "subscriptions_verification_info_verified_since_enabled": True,
-        "tweet_awards_web_tipping_enabled": False,
-        "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
-        "tweetypie_unmention_optimization_enabled": True,
-        "verified_phone_label_enabled": False,
-        "vibe_api_enabled": True,
-        "view_counts_everywhere_api_enabled": True,
-        "hidden_profile_subscriptions_enabled": True,
-        "subscriptions_verification_info_is_identity_verified_enabled": True,
-    }
-
-    @classmethod
-    def _operation_to_url(cls, operation: str) -> tuple[str, str]:
-        """
-        :return: URL and Query ID
-        """
-        query_id = cls._OPERATION_TO_QUERY_ID[operation]
-        url = f"{cls._GRAPHQL_URL}/{query_id}/{operation}"
-        return url, query_id
+    _DEFAULT_VARIABLES = MappingProxyType(
+        {
+            "count": 1000,
+            "withSafetyModeUserFields": True,
+            "includePromotedContent": True,
+            "withQuickPromoteEligibilityTweetFields": True,
+            "withVoice": True,
+            "withV2Timeline": True,
+            "withDownvotePerspective": False,
+            "withBirdwatchNotes": True,
+            "withCommunity": True,
+            "withSuperFollowsUserFields": True,
+            "withReactionsMetadata": False,
+            "withReactionsPerspective": False,
+            "withSuperFollowsTweetFields": True,
+            "isMetatagsQuery": False,
+            "withReplays": True,
+            "withClientEventToken": False,
+            "withAttachments": True,
+            "withConversationQueryHighlights": True,
+            "withMessageQueryHighlights": True,
+            "withMessages": True,
+        }
+    )
+    _DEFAULT_FEATURES = MappingProxyType(
+        {
+            "c9s_tweet_anatomy_moderator_badge_enabled": True,
+            "responsive_web_home_pinned_timelines_enabled": True,
+            "blue_business_profile_image_shape_enabled": True,
+            "creator_subscriptions_tweet_preview_api_enabled": True,
+            "freedom_of_speech_not_reach_fetch_enabled": True,
+            "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
+            "graphql_timeline_v2_bookmark_timeline": True,
+            "hidden_profile_likes_enabled": True,
+            "highlights_tweets_tab_ui_enabled": True,
+            "interactive_text_enabled": True,
+            "longform_notetweets_consumption_enabled": True,
+            "longform_notetweets_inline_media_enabled": True,
+            "longform_notetweets_rich_text_read_enabled": True,
+            "longform_notetweets_richtext_consumption_enabled": True,
+            "profile_foundations_tweet_stats_enabled": True,
+            "profile_foundations_tweet_stats_tweet_frequency": True,
+            "responsive_web_birdwatch_note_limit_enabled": True,
+            "responsive_web_edit_tweet_api_enabled": True,
+            "responsive_web_enhance_cards_enabled": False,
+            "responsive_web_graphql_exclude_directive_enabled": True,
+            "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+            "responsive_web_graphql_timeline_navigation_enabled": True,
+            "responsive_web_media_download_video_enabled": False,
+            "responsive_web_text_conversations_enabled": False,
+            "responsive_web_twitter_article_data_v2_enabled": True,
+            "responsive_web_twitter_article_tweet_consumption_enabled": False,
+            "responsive_web_twitter_blue_verified_badge_is_enabled": True,
+            "rweb_lists_timeline_redesign_enabled": True,
+            "spaces_2022_h2_clipping": True,
+            "spaces_2022_h2_spaces_communities": True,
+            "standardized_nudges_misinfo": True,
+            "subscriptions_verification_info_verified_since_enabled": True,
+            "tweet_awards_web_tipping_enabled": False,
+            "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
+            "tweetypie_unmention_optimization_enabled": True,
+            "verified_phone_label_enabled": False,
+            "vibe_api_enabled": True,
+            "view_counts_everywhere_api_enabled": True,
+            "hidden_profile_subscriptions_enabled": True,
+            "subscriptions_verification_info_is_identity_verified_enabled": True,
+        }
+    )
+    # Неизменяемые шаблоны: переменные каждого запроса собираются в новом словаре
+    _OPERATIONS = build_shared_registry(
+        _OPERATION_TO_QUERY_ID,
+        features=_DEFAULT_FEATURES,
+        variables=_DEFAULT_VARIABLES,
+    )
 
     def __init__(self, client: Client):
         self._client = client
 
     async def gql_request(
-        self, method, operation, **kwargs
+        self, method, operation, variables: dict = None, **kwargs
     ) -> tuple[requests.Response, dict]:
-        url, query_id = self._operation_to_url(operation)
+        """
+        :param variables: Переменные запроса. Дополняют переменные по умолчанию.
+        """
+        operation = self._OPERATIONS[operation]
 
         if method == "POST":
-            payload = kwargs["json"] = kwargs.get("json") or {}
-            payload["queryId"] = query_id
+            headers = kwargs["headers"] = kwargs.get("headers", {})
+            headers["content-type"] = "application/json"
+            kwargs["data"] = operation.body(variables)
         else:
-            params = kwargs["params"] = kwargs.get("params") or {}
-            ...
+            kwargs["params"] = operation.params(variables)
 
-        response, data = await self._client.request(method, url, **kwargs)
+        response, data = await self._client.request(method, operation.url, **kwargs)
         return response, data["data"]
 
     async def user_by_username(self, username: str) -> User | None:
-        features = self._DEFAULT_FEATURES
-        variables = self._DEFAULT_VARIABLES
-        variables["screen_name"] = username
-        params = {
-            "variables": variables,
-            "features": features,
-        }
         response, data = await self.gql_request(
-            "GET", "UserByScreenName", params=params
+            "GET", "UserByScreenName", {"screen_name": username}
+        )
+        if not data:
+            return None
+        return User.from_raw_data(
+            data["user"]["result"], raw_data=self._client.raw_data_policy
         )
-        return User.from_raw_data(data["user"]["result"]) if data else None
 
     async def users_by_ids(
         self, user_ids: Iterable[str | int]
     ) -> dict[int : User | Account]:
-        features = self._DEFAULT_FEATURES
-        variables = self._DEFAULT_VARIABLES
-        variables["userIds"] = list({str(user_id) for user_id in user_ids})
-        params = {
-            "variables": variables,
-            "features": features,
-        }
-        response, data = await self.gql_request("GET", "UsersByRestIds", params=params)
+        variables = {"userIds": list({str(user_id) for user_id in user_ids})}
+        response, data = await self.gql_request("GET", "UsersByRestIds", variables)
 
         users = {}
         for user_data in data["users"]:
-            user = User.from_raw_data(user_data["result"])
+            user = User.from_raw_data(
+                user_data["result"], raw_data=self._client.raw_data_policy
+            )
             users[user.id] = user
             if user.id == self._client.account.id:
                 users[self._client.account.id] = self._client.account
@@ -5,6 +5,7 @@ from .account import Account
 __all__ = [
     "TwitterException",
     "FailedToFindDuplicatePost",
+    "MediaProcessingFailed",
     "HTTPException",
     "BadRequest",
     "Unauthorized",
@@ -29,6 +30,14 @@ class FailedToFindDuplicatePost(TwitterException):
     pass
 
 
+class MediaProcessingFailed(TwitterException):
+    def __init__(self, media_id: int, error: dict | None):
+        self.media_id = media_id
+        self.error = error or {}
+        message = self.error.get("message") or self.error.get("name") or "unknown error"
+        super().__init__(f"Media {media_id} processing failed: {message}")
+
+
 def _http_exception_message(
     response: requests.Response,
     api_errors: list[dict],
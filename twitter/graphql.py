@@ -0,0 +1,332 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Iterable, Literal, Mapping
+
+from .utils import to_json
+
+GRAPHQL_URL = "https://x.com/i/api/graphql"
+
+
+@dataclass(frozen=True, eq=False)
+class GraphQLOperation:
+    """
+    Шаблон GraphQL операции: query ID, неизменяемые features, field toggles и переменные по умолчанию.
+    features и field toggles кодируются в JSON один раз, при каждом запросе кодируются только переменные.
+    """
+
+    name: str
+    query_id: str
+    method: Literal["GET", "POST"] = "GET"
+    features: Mapping[str, bool] = field(default_factory=dict)
+    variables: Mapping[str, Any] = field(default_factory=dict)
+    field_toggles: Mapping[str, bool] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for name in ("features", "variables", "field_toggles"):
+            object.__setattr__(self, name, MappingProxyType(dict(getattr(self, name))))
+
+    @property
+    def url(self) -> str:
+        return f"{GRAPHQL_URL}/{self.query_id}/{self.name}"
+
+    @cached_property
+    def encoded_features(self) -> str:
+        return to_json(dict(self.features))
+
+    @cached_property
+    def encoded_field_toggles(self) -> str:
+        return to_json(dict(self.field_toggles))
+
+    def build_variables(self, variables: Mapping[str, Any] = None) -> dict:
+        """
+        :return: Новый словарь: переменные по умолчанию, дополненные переданными.
+        """
+        return {**self.variables, **(variables or {})}
+
+    def params(self, variables: Mapping[str, Any] = None) -> dict[str, str]:
+        """
+        :return: Параметры GET запроса, уже закодированные в JSON.
+        """
+        params = {"variables": to_json(self.build_variables(variables))}
+        if self.features:
+            params["features"] = self.encoded_features
+        if self.field_toggles:
+            params["fieldToggles"] = self.encoded_field_toggles
+        return params
+
+    def body(self, variables: Mapping[str, Any] = None) -> str:
+        """
+        :return: JSON тело POST запроса.
+        """
+        parts = [f'"variables":{to_json(self.build_variables(variables))}']
+        if self.features:
+            parts.append(f'"features":{self.encoded_features}')
+        if self.field_toggles:
+            parts.append(f'"fieldToggles":{self.encoded_field_toggles}')
+        parts.append(f'"queryId":{to_json(self.query_id)}')
+        return "{" + ",".join(parts) + "}"
+
+
+def build_registry(
+    operations: Iterable[GraphQLOperation],
+) -> Mapping[str, GraphQLOperation]:
+    return MappingProxyType({operation.name: operation for operation in operations})
+
+
+def build_shared_registry(
+    query_ids: Mapping[str, str],
+    *,
+    features: Mapping[str, bool] = None,
+    variables: Mapping[str, Any] = None,
+) -> Mapping[str, GraphQLOperation]:
+    """
+    :return: Реестр операций с общими features и переменными по умолчанию.
+    """
+    return build_registry(
+        GraphQLOperation(
+            name, query_id, features=features or {}, variables=variables or {}
+        )
+        for name, query_id in query_ids.items()
+    )
+
+
+_FOLLOWS_FEATURES = {
+    "rweb_lists_timeline_redesign_enabled": True,
+    "responsive_web_graphql_exclude_directive_enabled": True,
+    "verified_phone_label_enabled": False,
+    "creator_subscriptions_tweet_preview_api_enabled": True,
+    "responsive_web_graphql_timeline_navigation_enabled": True,
+    "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+    "tweetypie_unmention_optimization_enabled": True,
+    "responsive_web_edit_tweet_api_enabled": True,
+    "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
+    "view_counts_everywhere_api_enabled": True,
+    "longform_notetweets_consumption_enabled": True,
+    "responsive_web_twitter_article_tweet_consumption_enabled": False,
+    "tweet_awards_web_tipping_enabled": False,
+    "freedom_of_speech_not_reach_fetch_enabled": True,
+    "standardized_nudges_misinfo": True,
+    "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
+    "longform_notetweets_rich_text_read_enabled": True,
+    "longform_notetweets_inline_media_enabled": True,
+    "responsive_web_media_download_video_enabled": False,
+    "responsive_web_enhance_cards_enabled": False,
+}
+
+OPERATIONS = build_registry(
+    (
+        GraphQLOperation(
+            "UserByScreenName",
+            "G3KGOASz96M-Qu0nwmGXNg",
+            features={
+                "hidden_profile_likes_enabled": True,
+                "hidden_profile_subscriptions_enabled": True,
+                "responsive_web_graphql_exclude_directive_enabled": True,
+                "verified_phone_label_enabled": False,
+                "subscriptions_verification_info_is_identity_verified_enabled": True,
+                "subscriptions_verification_info_verified_since_enabled": True,
+                "highlights_tweets_tab_ui_enabled": True,
+                "creator_subscriptions_tweet_preview_api_enabled": True,
+                "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+                "responsive_web_graphql_timeline_navigation_enabled": True,
+            },
+            variables={
+                "withSafetyModeUserFields": True,
+            },
+            field_toggles={
+                "withAuxiliaryUserLabels": False,
+            },
+        ),
+        GraphQLOperation(
+            "UsersByRestIds",
+            "itEhGywpgX9b3GJCzOtSrA",
+            features={
+                "responsive_web_graphql_exclude_directive_enabled": True,
+                "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+                "responsive_web_graphql_timeline_navigation_enabled": True,
+                "verified_phone_label_enabled": False,
+            },
+        ),
+        GraphQLOperation(
+            "CreateRetweet",
+            "ojPdsZsimiJrUGLR1sjUtA",
+            method="POST",
+            variables={
+                "dark_request": False,
+            },
+        ),
+        GraphQLOperation(
+            "FavoriteTweet",
+            "lI07N6Otwv1PhnEgXILM7A",
+            method="POST",
+            variables={
+                "dark_request": False,
+            },
+        ),
+        GraphQLOperation(
+            "UnfavoriteTweet",
+            "ZYKSe-w7KEslx3JhSIk5LA",
+            method="POST",
+            variables={
+                "dark_request": False,
+            },
+        ),
+        GraphQLOperation(
+            "DeleteTweet",
+            "VaenaVgh5q5ih7kvyVjgtg",
+            method="POST",
+            variables={
+                "dark_request": False,
+            },
+        ),
+        GraphQLOperation(
+            "CreateTweet",
+            "oB-5XsHNAbjvARJEc8CZFw",
+            method="POST",
+            features={
+                "communities_web_enable_tweet_community_results_fetch": True,
+                "c9s_tweet_anatomy_moderator_badge_enabled": True,
+                "tweetypie_unmention_optimization_enabled": True,
+                "responsive_web_edit_tweet_api_enabled": True,
+                "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
+                "view_counts_everywhere_api_enabled": True,
+                "longform_notetweets_consumption_enabled": True,
+                "responsive_web_twitter_article_tweet_consumption_enabled": True,
+                "tweet_awards_web_tipping_enabled": False,
+                "creator_subscriptions_quote_tweet_preview_enabled": False,
+                "longform_notetweets_rich_text_read_enabled": True,
+                "longform_notetweets_inline_media_enabled": True,
+                "articles_preview_enabled": True,
+                "rweb_video_timestamps_enabled": True,
+                "rweb_tipjar_consumption_enabled": True,
+                "responsive_web_graphql_exclude_directive_enabled": True,
+                "verified_phone_label_enabled": False,
+                "freedom_of_speech_not_reach_fetch_enabled": True,
+                "standardized_nudges_misinfo": True,
+                "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
+                "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+                "responsive_web_graphql_timeline_navigation_enabled": True,
+                "responsive_web_enhance_cards_enabled": False,
+            },
+            variables={
+                "dark_request": False,
+                "semantic_annotation_ids": (),
+            },
+        ),
+        GraphQLOperation(
+            "ModerateTweet",
+            "p'jF:GVqCjTcZol0xcBJjw",
+            method="POST",
+        ),
+        GraphQLOperation(
+            "TweetResultByRestId",
+            "V3vfsYzNEyD9tsf4xoFRgw",
+        ),
+        GraphQLOperation(
+            "ProfileSpotlightsQuery",
+            "9zwVLJ48lmVUk8u_Gh9DmA",
+        ),
+        GraphQLOperation(
+            "Followers",
+            "3yX7xr2hKjcZYnXt6cU6lQ",
+            features=_FOLLOWS_FEATURES,
+            variables={
+                "includePromotedContent": False,
+            },
+        ),
+        GraphQLOperation(
+            "Following",
+            "t-BPOrMIduGUJWO_LxcvNQ",
+            features=_FOLLOWS_FEATURES,
+            variables={
+                "includePromotedContent": False,
+            },
+        ),
+        GraphQLOperation(
+            "TweetDetail",
+            "VWFGPVAGkZMGRKGe3GFFnA",
+            features={
+                "rweb_lists_timeline_redesign_enabled": True,
+                "responsive_web_graphql_exclude_directive_enabled": True,
+                "verified_phone_label_enabled": False,
+                "creator_subscriptions_tweet_preview_api_enabled": True,
+                "responsive_web_graphql_timeline_navigation_enabled": True,
+                "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+                "tweetypie_unmention_optimization_enabled": True,
+                "responsive_web_edit_tweet_api_enabled": True,
+                "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
+                "view_counts_everywhere_api_enabled": True,
+                "longform_notetweets_consumption_enabled": True,
+                "tweet_awards_web_tipping_enabled": False,
+                "freedom_of_speech_not_reach_fetch_enabled": True,
+                "standardized_nudges_misinfo": True,
+                "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
+                "longform_notetweets_rich_text_read_enabled": True,
+                "longform_notetweets_inline_media_enabled": True,
+                "responsive_web_enhance_cards_enabled": False,
+            },
+            variables={
+                "with_rux_injections": False,
+                "includePromotedContent": True,
+                "withCommunity": True,
+                "withQuickPromoteEligibilityTweetFields": True,
+                "withBirdwatchNotes": True,
+                "withVoice": True,
+                "withV2Timeline": True,
+            },
+        ),
+        GraphQLOperation(
+            "UserTweets",
+            "V1ze5q3ijDS1VeLwLY0m7g",
+            features={
+                "responsive_web_graphql_exclude_directive_enabled": True,
+                "verified_phone_label_enabled": False,
+                "creator_subscriptions_tweet_preview_api_enabled": True,
+                "responsive_web_graphql_timeline_navigation_enabled": True,
+                "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+                "c9s_tweet_anatomy_moderator_badge_enabled": True,
+                "tweetypie_unmention_optimization_enabled": True,
+                "responsive_web_edit_tweet_api_enabled": True,
+                "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
+                "view_counts_everywhere_api_enabled": True,
+                "longform_notetweets_consumption_enabled": True,
+                "responsive_web_twitter_article_tweet_consumption_enabled": False,
+                "tweet_awards_web_tipping_enabled": False,
+                "freedom_of_speech_not_reach_fetch_enabled": True,
+                "standardized_nudges_misinfo": True,
+                "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
+                "rweb_video_timestamps_enabled": True,
+                "longform_notetweets_rich_text_read_enabled": True,
+                "longform_notetweets_inline_media_enabled": True,
+                "responsive_web_media_download_video_enabled": False,
+                "responsive_web_enhance_cards_enabled": False,
+            },
+            variables={
+                "includePromotedContent": True,
+                "withQuickPromoteEligibilityTweetFields": True,
+                "withVoice": True,
+                "withV2Timeline": True,
+            },
+        ),
+        GraphQLOperation(
+            "Viewer",
+            "-876iyxD1O_0X0BqeykjZA",
+            features={
+                "rweb_tipjar_consumption_enabled": True,
+                "responsive_web_graphql_exclude_directive_enabled": True,
+                "verified_phone_label_enabled": False,
+                "creator_subscriptions_tweet_preview_api_enabled": True,
+                "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+                "responsive_web_graphql_timeline_navigation_enabled": True,
+            },
+            variables={
+                "withCommunitiesMemberships": True,
+            },
+            field_toggles={
+                "isDelegate": False,
+                "withAuxiliaryUserLabels": False,
+            },
+        ),
+    )
+)
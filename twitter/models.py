@@ -1,27 +1,95 @@
-from typing import Optional, Any
+from typing import Optional, Any, Literal, Sequence
 from datetime import datetime, timedelta
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+from .enums import AccountStatus
 from .utils import to_datetime, tweet_url
 
+RawDataPolicy = Literal["all", "none"] | Sequence[str]
+"""
+Какие исходные данные хранить в raw_data:
+    - "all" Все данные. По умолчанию.
+    - "none" Ничего, raw_data равно None.
+    - Последовательность путей через точку, например ("legacy.entities", "views.count").
+"""
+
+
+def retain_raw_data(data: dict, policy: RawDataPolicy = "all") -> dict | None:
+    """
+    :return: Исходные данные, их проекция на пути из policy или None.
+    """
+    if policy == "all":
+        return data
+    if policy == "none":
+        return None
+
+    projection = {}
+    for path in policy:
+        *parents, key = path.split(".")
+        value = data
+        for part in parents + [key]:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projection
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[key] = value
+    return projection
+
+
+def _construct(cls: type[BaseModel], values: dict):
+    """
+    Быстрый аналог model_construct для уже проверенных значений всех полей модели.
+    """
+    if len(values) != len(cls.model_fields):
+        return cls.model_construct(**values)
+
+    model = cls.__new__(cls)
+    object.__setattr__(model, "__dict__", values)
+    object.__setattr__(model, "__pydantic_fields_set__", set(values))
+    object.__setattr__(model, "__pydantic_extra__", None)
+    object.__setattr__(model, "__pydantic_private__", None)
+    return model
+
 
 class Image(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     type: str = Field(..., alias="image_type")
     width: int = Field(..., alias="w")
     height: int = Field(..., alias="h")
 
 
+class ProcessingInfo(BaseModel):
+    state: str  # pending, in_progress, succeeded, failed
+    check_after_secs: int | None = None
+    progress_percent: int | None = None
+    error: dict | None = None
+
+
 class Media(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     id: int = Field(..., alias="media_id")
-    image: Image
-    size: int
+    image: Image | None = None
+    size: int | None = None
     expires_at: datetime = Field(..., alias="expires_after_secs")
+    processing_info: ProcessingInfo | None = None
 
     @field_validator("expires_at", mode="before")
     @classmethod
     def set_expires_at(cls, v):
-        return datetime.now() + timedelta(seconds=v)
+        # Twitter возвращает expires_after_secs, а сохраненная модель - сам момент истечения
+        if isinstance(v, (int, float)):
+            return datetime.now() + timedelta(seconds=v)
+        return v
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at <= datetime.now()
 
     def __str__(self):
         return str(self.id)
@@ -53,7 +121,10 @@ class User(BaseModel):
         return hash(self.id)
 
     @classmethod
-    def from_raw_data(cls, data: dict):
+    def from_raw_data(cls, data: dict, *, raw_data: RawDataPolicy = "all"):
+        """
+        :param raw_data: Какие исходные данные хранить в raw_data.
+        """
         legacy = data["legacy"]
         keys = ("name", "description", "location", "followers_count", "friends_count")
         values = {key: legacy[key] for key in keys}
@@ -62,10 +133,11 @@ class User(BaseModel):
                 "id": int(data["rest_id"]),
                 "username": legacy["screen_name"],
                 "created_at": to_datetime(legacy["created_at"]),
-                "raw_data": data,
+                "raw_data": retain_raw_data(data, raw_data),
             }
         )
-        return cls(**values)
+        # Типы значений уже приведены выше: повторная проверка pydantic не нужна
+        return _construct(cls, values)
 
 
 class Tweet(BaseModel):
@@ -94,7 +166,7 @@ class Tweet(BaseModel):
     user:            User
     url:             str
 
-    raw_data:        dict
+    raw_data:        dict | None = None
 
     # TODO hashtags
     # TODO media
@@ -119,11 +191,27 @@ class Tweet(BaseModel):
         return f"{self.text[:32]}..." if len(self.text) > 16 else self.text
 
     @classmethod
-    def from_raw_data(cls, data: dict):
+    def from_raw_data(
+        cls,
+        data: dict,
+        *,
+        raw_data: RawDataPolicy = "all",
+        users: dict[int, User] = None,
+    ):
+        """
+        :param raw_data: Какие исходные данные хранить в raw_data твита, вложенных твитов и авторов.
+        :param users: Уже построенные пользователи по ID. Автор, который уже есть в словаре,
+            не строится заново, а берется из него, поэтому твиты одного автора делят один объект User.
+            Новые авторы добавляются в словарь.
+        """
         legacy_data = data["legacy"]
 
         user_data = data["core"]["user_results"]["result"]
-        user = User.from_raw_data(user_data)
+        user_id = int(user_data["rest_id"])
+        if users is None or (user := users.get(user_id)) is None:
+            user = User.from_raw_data(user_data, raw_data=raw_data)
+            if users is not None:
+                users[user_id] = user
 
         id = int(legacy_data["id_str"])
         url = tweet_url(user.username, id)
@@ -131,12 +219,16 @@ class Tweet(BaseModel):
         retweeted_tweet = None
         if "retweeted_status_result" in legacy_data:
             retweeted_tweet_data = legacy_data["retweeted_status_result"]["result"]
-            retweeted_tweet = cls.from_raw_data(retweeted_tweet_data)
+            retweeted_tweet = cls.from_raw_data(
+                retweeted_tweet_data, raw_data=raw_data, users=users
+            )
 
         quoted_tweet = None
         if "quoted_status_result" in data:
             quoted_tweet_data = data["quoted_status_result"]["result"]
-            quoted_tweet = cls.from_raw_data(quoted_tweet_data)
+            quoted_tweet = cls.from_raw_data(
+                quoted_tweet_data, raw_data=raw_data, users=users
+            )
 
         values = {
             "id": id,
@@ -153,15 +245,14 @@ class Tweet(BaseModel):
             "bookmark_count": legacy_data["bookmark_count"],
             "favorite_count": legacy_data["favorite_count"],
             "reply_count": legacy_data["reply_count"],
-            "user": user.model_dump(),
-            "quoted_tweet": quoted_tweet.model_dump() if quoted_tweet else None,
-            "retweeted_tweet": (
-                retweeted_tweet.model_dump() if retweeted_tweet else None
-            ),
+            "user": user,
+            "quoted_tweet": quoted_tweet,
+            "retweeted_tweet": retweeted_tweet,
             "url": url,
-            "raw_data": data,
+            "raw_data": retain_raw_data(data, raw_data),
         }
-        return cls(**values)
+        # Вложенные модели уже построены: собираем граф объектов без повторной проверки
+        return _construct(cls, values)
 
 
 class Subtask(BaseModel):
@@ -186,3 +277,18 @@ class Subtask(BaseModel):
                 if detail_text := header.get("detail_text"):
                     task["detail_text"] = detail_text["text"]
         return cls(**task, raw_data=data)
+
+
+class SessionSnapshot(BaseModel):
+    # fmt: off
+    auth_token:        str           | None = None
+    ct0:               str           | None = None
+    guest_token:       str           | None = None
+    cookies:           list[dict]           = Field(default_factory=list)
+    id:                int           | None = None
+    username:          str           | None = None
+    status:            AccountStatus | None = None
+    status_updated_at: datetime      | None = None
+    info_updated_at:   datetime      | None = None
+    saved_at:          datetime             = Field(default_factory=datetime.now)
+    # fmt: on
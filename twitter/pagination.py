@@ -0,0 +1,92 @@
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+PageFetcher = Callable[[str | None], Awaitable[tuple[list[T], str | None]]]
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+async def _paginate(
+    fetch_page: PageFetcher,
+    cursor: str | None,
+    max_pages: int | None,
+) -> AsyncIterator[list[T]]:
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        items, next_cursor = await fetch_page(cursor)
+        pages += 1
+        # Страница может быть пустой после отбора элементов (например, недоступных пользователей),
+        # поэтому конец ленты определяется только по курсору
+        if items:
+            yield items
+
+        if not next_cursor or next_cursor == cursor:
+            return
+        cursor = next_cursor
+
+
+async def _prefetch(
+    pages: AsyncIterator[list[T]], depth: int
+) -> AsyncIterator[list[T]]:
+    queue = asyncio.Queue(maxsize=depth)
+
+    async def produce():
+        try:
+            async with aclosing(pages):
+                async for items in pages:
+                    await queue.put(items)
+        except Exception as exc:
+            await queue.put(_Failure(exc))
+            return
+        await queue.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (items := await queue.get()) is not _DONE:
+            if isinstance(items, _Failure):
+                raise items.exc
+            yield items
+    finally:
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+
+
+async def paginate(
+    fetch_page: PageFetcher,
+    *,
+    cursor: str = None,
+    max_pages: int = None,
+    prefetch: int = 0,
+) -> AsyncIterator[list[T]]:
+    """
+    Проходит по страницам курсорной ленты.
+
+    Останавливается при отсутствии или повторе курсора, а также после max_pages страниц.
+    Пустые страницы пропускаются.
+
+    :param fetch_page: Запрашивает страницу по курсору. Возвращает элементы страницы и курсор следующей страницы.
+        Если на странице нет ни одной записи, fetch_page должен вернуть None вместо курсора.
+    :param cursor: Курсор первой страницы.
+    :param max_pages: Максимальное количество страниц.
+    :param prefetch: Количество страниц, которые запрашиваются заранее, пока обрабатывается текущая.
+        Следующая страница запрашивается сразу, как только известен ее курсор.
+        В памяти хранится не больше prefetch готовых страниц.
+    """
+    pages = _paginate(fetch_page, cursor, max_pages)
+    if prefetch > 0:
+        pages = _prefetch(pages, prefetch)
+
+    async with aclosing(pages):
+        async for items in pages:
+            yield items
@@ -0,0 +1,269 @@
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    Sequence,
+    TypeVar,
+)
+import asyncio
+
+from better_proxy import Proxy
+from loguru import logger
+
+from .account import Account
+from .base import TransportPool
+from .client import Client
+from .enums import AccountStatus
+from .errors import TwitterException
+
+T = TypeVar("T")
+
+PARKED_STATUSES = frozenset(
+    {
+        AccountStatus.BAD_TOKEN,
+        AccountStatus.SUSPENDED,
+        AccountStatus.LOCKED,
+        AccountStatus.CONSENT_LOCKED,
+        AccountStatus.NOT_FOUND,
+    }
+)
+
+
+@dataclass
+class PoolResult(Generic[T]):
+    account: Account
+    result: T | None = None
+    exception: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.exception is None
+
+
+class _Slot:
+    def __init__(self, account: Account, proxy: str | None, concurrency: int):
+        self.account = account
+        self.proxy = proxy
+        self.client: Client | None = None
+        self.parked = False
+        self.in_flight = 0
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+
+
+class AccountPool:
+    """
+    Пул аккаунтов:
+        - Клиенты создаются и запускаются при первом использовании аккаунта.
+        - Ограничивает количество одновременных задач: всего, на аккаунт и на прокси.
+        - Аккаунты, статус которых стал плохим (SUSPENDED, LOCKED, BAD_TOKEN и т.д.), откладываются (parked).
+        - Клиенты с одинаковым прокси используют общий транспорт.
+    """
+
+    def __init__(
+        self,
+        accounts: Iterable[Account],
+        *,
+        proxies: Sequence[str | Proxy] = None,
+        concurrency: int = 100,
+        per_account_concurrency: int = 1,
+        per_proxy_concurrency: int = None,
+        park_statuses: Iterable[AccountStatus] = PARKED_STATUSES,
+        share_transport: bool = True,
+        **client_kwargs,
+    ):
+        """
+        :param accounts: Аккаунты.
+        :param proxies: Прокси. Распределяются между аккаунтами по кругу.
+        :param concurrency: Максимальное количество одновременных задач.
+        :param per_account_concurrency: Максимальное количество одновременных задач одного аккаунта.
+        :param per_proxy_concurrency: Максимальное количество одновременных задач через один прокси.
+        :param park_statuses: Статусы, при которых аккаунт откладывается.
+        :param share_transport: Использовать общий транспорт (TransportPool).
+        :param client_kwargs: Параметры Client.
+        """
+        proxies = [
+            proxy.as_url if isinstance(proxy, Proxy) else Proxy.from_str(proxy).as_url
+            for proxy in proxies or ()
+        ]
+        self._slots = [
+            _Slot(
+                account,
+                proxies[i % len(proxies)] if proxies else None,
+                per_account_concurrency,
+            )
+            for i, account in enumerate(accounts)
+        ]
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._proxy_semaphores = (
+            {proxy: asyncio.Semaphore(per_proxy_concurrency) for proxy in proxies}
+            if per_proxy_concurrency
+            else {}
+        )
+        self._park_statuses = frozenset(park_statuses)
+        self._transport_pool = TransportPool() if share_transport else None
+        self._client_kwargs = client_kwargs
+        self._next_slot = 0
+
+    @property
+    def accounts(self) -> list[Account]:
+        return [slot.account for slot in self._slots]
+
+    @property
+    def active(self) -> list[Account]:
+        return [slot.account for slot in self._slots if not slot.parked]
+
+    @property
+    def parked(self) -> list[Account]:
+        return [slot.account for slot in self._slots if slot.parked]
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        for slot in self._slots:
+            await self._close_client(slot)
+        if self._transport_pool:
+            await self._transport_pool.close()
+
+    async def _close_client(self, slot: _Slot):
+        if slot.client is None:
+            return
+
+        client, slot.client = slot.client, None
+        await client.close()
+
+    async def _park(self, slot: _Slot):
+        """
+        Клиент закрывается в _run, когда завершится последняя задача аккаунта:
+        при per_account_concurrency > 1 он еще может использоваться другими задачами.
+        """
+        if slot.parked:
+            return
+
+        slot.parked = True
+        logger.warning(
+            f"(auth_token={slot.account.hidden_auth_token}, id={slot.account.id}, username={slot.account.username})"
+            f" Account parked. Status: {slot.account.status}"
+        )
+
+    async def _get_client(self, slot: _Slot) -> Client:
+        async with slot.lock:
+            if slot.client is None:
+                client = Client(
+                    slot.account,
+                    proxy=slot.proxy,
+                    transport_pool=self._transport_pool,
+                    **self._client_kwargs,
+                )
+                try:
+                    await client.__aenter__()
+                except BaseException:
+                    await client.close()
+                    raise
+                slot.client = client
+            return slot.client
+
+    async def _run(
+        self, slot: _Slot, func: Callable[[Client], Awaitable[T]]
+    ) -> PoolResult[T]:
+        slot.in_flight += 1
+        try:
+            async with AsyncExitStack() as stack:
+                await stack.enter_async_context(slot.semaphore)
+                if slot.proxy in self._proxy_semaphores:
+                    await stack.enter_async_context(self._proxy_semaphores[slot.proxy])
+                await stack.enter_async_context(self._semaphore)
+
+                if slot.parked:
+                    exc = TwitterException("Account is parked")
+                    return PoolResult(slot.account, exception=exc)
+
+                try:
+                    client = await self._get_client(slot)
+                    return PoolResult(slot.account, result=await func(client))
+                except Exception as exc:
+                    return PoolResult(slot.account, exception=exc)
+                finally:
+                    if slot.account.status in self._park_statuses:
+                        await self._park(slot)
+        finally:
+            slot.in_flight -= 1
+            if slot.parked and not slot.in_flight:
+                await self._close_client(slot)
+
+    def _choose_slot(self) -> _Slot:
+        """
+        :return: Активный аккаунт с наименьшим количеством выполняемых задач (по кругу).
+        """
+        best = None
+        for i in range(len(self._slots)):
+            slot = self._slots[(self._next_slot + i) % len(self._slots)]
+            if slot.parked:
+                continue
+            if best is None or slot.in_flight < best.in_flight:
+                best = slot
+                if not slot.in_flight:
+                    break
+
+        if best is None:
+            raise TwitterException("No active accounts in pool")
+
+        self._next_slot = (self._slots.index(best) + 1) % len(self._slots)
+        return best
+
+    async def submit(self, func: Callable[[Client], Awaitable[T]]) -> PoolResult[T]:
+        """
+        Выполняет задачу на свободном активном аккаунте.
+
+        :param func: Принимает клиент и возвращает корутину. Например, lambda client: client.like(tweet_id)
+        """
+        return await self._run(self._choose_slot(), func)
+
+    async def map(
+        self,
+        func: Callable[[Client], Awaitable[T]],
+        accounts: Iterable[Account] = None,
+    ) -> AsyncIterator[PoolResult[T]]:
+        """
+        Выполняет задачу на каждом активном аккаунте.
+        Результаты отдаются по мере готовности.
+
+        :param func: Принимает клиент и возвращает корутину. Например, lambda client: client.like(tweet_id)
+        :param accounts: Аккаунты пула, на которых нужно выполнить задачу. По умолчанию все активные.
+        """
+        if accounts is None:
+            slots = [slot for slot in self._slots if not slot.parked]
+        else:
+            account_ids = {id(account) for account in accounts}
+            slots = [
+                slot
+                for slot in self._slots
+                if id(slot.account) in account_ids and not slot.parked
+            ]
+
+        tasks = [asyncio.create_task(self._run(slot, func)) for slot in slots]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def gather(
+        self,
+        func: Callable[[Client], Awaitable[T]],
+        accounts: Iterable[Account] = None,
+    ) -> list[PoolResult[T]]:
+        return [result async for result in self.map(func, accounts)]
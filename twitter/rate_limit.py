@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from time import time
+from typing import Mapping
+import asyncio
+
+from yarl import URL
+
+
+@dataclass
+class RateLimit:
+    limit: int
+    remaining: int
+    reset: int  # Unix timestamp
+
+    @property
+    def reset_after(self) -> float:
+        return max(self.reset - time(), 0)
+
+    @property
+    def expired(self) -> bool:
+        return self.reset <= time()
+
+
+class RateLimiter:
+    """
+    Учет лимитов запросов одного аккаунта по заголовкам x-rate-limit-*:
+        - Лимиты хранятся отдельно для каждой GraphQL операции и каждого REST пути.
+        - Запрос, который превысит лимит, ждет его сброса, а не тратится на ответ 429.
+    """
+
+    def __init__(self):
+        self._limits: dict[str, RateLimit] = {}
+
+    @staticmethod
+    def key(url: str | URL) -> str:
+        """
+        :return: Имя GraphQL операции или хост и путь REST запроса.
+        """
+        url = URL(url)
+        if "/graphql/" in url.path:
+            return url.name
+        return f"{url.host}{url.path}"
+
+    def get(self, key: str) -> RateLimit | None:
+        rate_limit = self._limits.get(key)
+        if rate_limit and rate_limit.expired:
+            del self._limits[key]
+            return None
+        return rate_limit
+
+    @property
+    def limits(self) -> dict[str, RateLimit]:
+        """
+        :return: Действующие (не сброшенные) лимиты.
+        """
+        return {
+            key: rate_limit
+            for key in list(self._limits)
+            if (rate_limit := self.get(key))
+        }
+
+    def remaining(self, key: str) -> int | None:
+        """
+        :return: Оставшееся количество запросов или None, если лимит неизвестен.
+        """
+        rate_limit = self.get(key)
+        return rate_limit.remaining if rate_limit else None
+
+    def wait_time(self, key: str) -> float:
+        """
+        :return: Время (сек.) до появления свободного запроса.
+        """
+        rate_limit = self.get(key)
+        if not rate_limit or rate_limit.remaining > 0:
+            return 0
+        return rate_limit.reset_after
+
+    def update(self, key: str, headers: Mapping[str, str]) -> RateLimit | None:
+        try:
+            rate_limit = RateLimit(
+                limit=int(headers["x-rate-limit-limit"]),
+                remaining=int(headers["x-rate-limit-remaining"]),
+                reset=int(headers["x-rate-limit-reset"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        # Ответ сервера точнее локального счетчика
+        self._limits[key] = rate_limit
+        return rate_limit
+
+    async def acquire(self, key: str):
+        """
+        Резервирует запрос. Если лимит исчерпан, ждет его сброса.
+        """
+        while (rate_limit := self.get(key)) and rate_limit.remaining <= 0:
+            await asyncio.sleep(rate_limit.reset_after + 1)
+
+        if rate_limit:
+            rate_limit.remaining -= 1
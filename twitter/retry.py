@@ -0,0 +1,178 @@
+from typing import Callable, Mapping
+from time import monotonic
+import random
+
+from curl_cffi import requests
+
+from .errors import HTTPException, ServerError
+
+# Коды ошибок curl, после которых имеет смысл повторить запрос:
+#   7 - не удалось подключиться, 16 - ошибка HTTP/2, 28 - таймаут, 35 - ошибка TLS,
+#   52 - пустой ответ, 55 и 56 - ошибка отправки или получения данных
+RETRYABLE_CURL_ERROR_CODES = frozenset({7, 16, 28, 35, 52, 55, 56})
+# Коды ошибок curl, при которых запрос гарантированно не дошел до сервера:
+#   7 - не удалось подключиться, 35 - ошибка TLS
+UNSENT_CURL_ERROR_CODES = frozenset({7, 35})
+# Методы, повтор которых не меняет результат
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def is_retryable(exc: Exception) -> bool:
+    """
+    Временные ошибки: сетевые ошибки curl, 408 и 5xx.
+    """
+    if isinstance(exc, requests.errors.RequestsError):
+        return exc.code in RETRYABLE_CURL_ERROR_CODES
+    if isinstance(exc, ServerError):
+        return True
+    if isinstance(exc, HTTPException):
+        return exc.response.status_code == 408
+    return False
+
+
+def is_unsent(exc: Exception) -> bool:
+    """
+    Запрос не дошел до сервера, поэтому его можно повторить даже для неидемпотентного метода.
+    """
+    if isinstance(exc, requests.errors.RequestsError):
+        return exc.code in UNSENT_CURL_ERROR_CODES
+    return False
+
+
+class RetryPolicy:
+    """
+    Политика повторных запросов:
+        - Отдельное количество повторов для каждого класса исключений.
+        - Экспоненциальная задержка со случайным разбросом (jitter).
+        - Общее ограничение по времени (deadline) и по количеству попыток.
+        - Функция retryable решает, можно ли повторить запрос после исключения.
+        - Неидемпотентные запросы (POST и т.п.) по умолчанию повторяются только если
+          запрос не дошел до сервера: таймаут или 5xx могли означать, что твит уже создан.
+
+    Политика не хранит состояния, поэтому одну политику можно передавать множеству клиентов.
+    """
+
+    DEFAULT_BUDGETS = {
+        requests.errors.RequestsError: 3,
+        ServerError: 3,
+        HTTPException: 2,
+    }
+
+    def __init__(
+        self,
+        budgets: Mapping[type[Exception], int] = None,
+        *,
+        max_attempts: int = None,
+        backoff: float = 1,
+        backoff_max: float = 30,
+        jitter: float = 0.5,
+        deadline: float = None,
+        retryable: Callable[[Exception], bool] = is_retryable,
+        retryable_non_idempotent: Callable[[Exception], bool] = is_unsent,
+    ):
+        """
+        :param budgets: Количество повторов для каждого класса исключений. Используется самый близкий класс по MRO.
+        :param max_attempts: Общее максимальное количество попыток.
+        :param backoff: Задержка (сек.) перед первым повтором. Удваивается с каждым повтором.
+        :param backoff_max: Максимальная задержка (сек.).
+        :param jitter: Доля задержки, которая выбирается случайно (от 0 до 1).
+        :param deadline: Время (сек.), после которого запрос больше не повторяется.
+        :param retryable: Решает, можно ли повторить запрос после исключения.
+        :param retryable_non_idempotent: Дополнительно решает, можно ли повторить неидемпотентный запрос.
+            Передайте is_retryable, чтобы повторять их так же, как идемпотентные.
+        """
+        self.budgets = dict(self.DEFAULT_BUDGETS if budgets is None else budgets)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retryable = retryable
+        self.retryable_non_idempotent = retryable_non_idempotent
+
+    def budget(self, exc: Exception) -> tuple[type[Exception] | None, int]:
+        """
+        :return: Класс исключения, по которому ведется учет, и количество повторов для него.
+        """
+        for exc_class in type(exc).__mro__:
+            if exc_class in self.budgets:
+                return exc_class, self.budgets[exc_class]
+        return None, 0
+
+    def delay(self, retry_number: int) -> float:
+        """
+        :param retry_number: Номер повтора, начиная с 1.
+        :return: Задержка (сек.) перед повтором.
+        """
+        delay = min(self.backoff * 2 ** (retry_number - 1), self.backoff_max)
+        return delay - random.uniform(0, delay * self.jitter)
+
+    def start(self, idempotent: bool = True) -> "RetryState":
+        return RetryState(self, idempotent)
+
+
+class RetryState:
+    """
+    Состояние повторов одного запроса.
+    """
+
+    def __init__(self, policy: RetryPolicy, idempotent: bool = True):
+        self.policy = policy
+        self.idempotent = idempotent
+        self.attempts = 1
+        self.retries: dict[type[Exception], int] = {}
+        self._started_at = monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return monotonic() - self._started_at
+
+    def deadline_exceeded(self, delay: float = 0) -> bool:
+        deadline = self.policy.deadline
+        return deadline is not None and self.elapsed + delay > deadline
+
+    def attempts_exhausted(self) -> bool:
+        max_attempts = self.policy.max_attempts
+        return max_attempts is not None and self.attempts >= max_attempts
+
+    def wait(self, delay: float) -> bool:
+        """
+        Учитывает попытку, которую нужно повторить после задержки независимо от бюджетов исключений
+        (например, после сброса лимита запросов).
+
+        :return: Можно ли повторить запрос.
+        """
+        if self.attempts_exhausted() or self.deadline_exceeded(delay):
+            return False
+
+        self.attempts += 1
+        return True
+
+    def next_delay(self, exc: Exception) -> float | None:
+        """
+        Учитывает неудачную попытку.
+
+        :return: Задержка (сек.) перед следующей попыткой или None, если запрос не нужно повторять.
+        """
+        policy = self.policy
+        if self.attempts_exhausted():
+            return None
+
+        if not policy.retryable(exc):
+            return None
+
+        if not self.idempotent and not policy.retryable_non_idempotent(exc):
+            return None
+
+        exc_class, budget = policy.budget(exc)
+        retries = self.retries.get(exc_class, 0)
+        if retries >= budget:
+            return None
+
+        retries = self.retries[exc_class] = retries + 1
+        delay = policy.delay(retries)
+        if self.deadline_exceeded(delay):
+            return None
+
+        self.attempts += 1
+        return delay
@@ -0,0 +1,261 @@
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Sequence
+import asyncio
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+
+from better_proxy import Proxy
+from loguru import logger
+
+from .account import Account
+from .base import TransportPool
+from .client import Client
+from .errors import TwitterException
+from .pool import PoolResult
+
+Task = Callable[[Client], Awaitable[Any]]
+
+
+def _picklable_exception(exc: Exception | None) -> Exception | None:
+    if exc is None:
+        return None
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return TwitterException(f"{exc.__class__.__name__}: {exc}")
+
+
+def _picklable_result(result: Any) -> tuple[Any, Exception | None]:
+    """
+    Результат, который не сериализуется pickle, иначе молча потерялся бы в очереди.
+    """
+    try:
+        pickle.dumps(result)
+        return result, None
+    except Exception as exc:
+        return None, TwitterException(f"Result is not picklable: {exc!r}")
+
+
+async def _run_item(
+    task: Task,
+    item: tuple[int, dict, str | None],
+    output_queue: multiprocessing.Queue,
+    transport_pool: TransportPool,
+    client_kwargs: dict,
+):
+    index, account_data, proxy = item
+    account = Account(**account_data)
+    result, exception = None, None
+    try:
+        async with Client(
+            account,
+            proxy=proxy,
+            transport_pool=transport_pool,
+            **client_kwargs,
+        ) as client:
+            result = await task(client)
+    except Exception as exc:
+        exception = exc
+
+    if exception is None:
+        result, exception = _picklable_result(result)
+
+    account_data = account.model_dump(exclude={"raw_data"})
+    output_queue.put((index, account_data, result, _picklable_exception(exception)))
+
+
+async def _worker_main(
+    task: Task,
+    input_queue: multiprocessing.Queue,
+    output_queue: multiprocessing.Queue,
+    concurrency: int,
+    client_kwargs: dict,
+):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async with TransportPool() as transport_pool:
+        while True:
+            await semaphore.acquire()
+            item = await loop.run_in_executor(None, input_queue.get)
+            if item is None:
+                break
+
+            coroutine = _run_item(
+                task, item, output_queue, transport_pool, client_kwargs
+            )
+            item_task = asyncio.create_task(coroutine)
+            tasks.add(item_task)
+            item_task.add_done_callback(tasks.discard)
+            item_task.add_done_callback(lambda _: semaphore.release())
+
+        if tasks:
+            await asyncio.wait(tasks)
+
+
+def _worker(
+    number: int,
+    task: Task,
+    input_queue: multiprocessing.Queue,
+    output_queue: multiprocessing.Queue,
+    concurrency: int,
+    client_kwargs: dict,
+):
+    try:
+        asyncio.run(
+            _worker_main(task, input_queue, output_queue, concurrency, client_kwargs)
+        )
+    finally:
+        output_queue.put(number)
+
+
+class ShardedRunner:
+    """
+    Выполняет задачу на аккаунтах в нескольких процессах:
+        - Каждый процесс со своим event loop и общим транспортом для своих клиентов.
+        - Аккаунты раздаются процессам через очередь по мере освобождения мест.
+        - Результаты и изменения аккаунтов (статус, ct0, auth_token и т.д.) возвращаются в главный процесс
+          и применяются к переданным аккаунтам.
+
+    Задача и ее результат передаются между процессами, поэтому задача должна быть функцией уровня модуля
+    (не lambda), а результат должен сериализоваться pickle.
+    """
+
+    def __init__(
+        self,
+        task: Task,
+        *,
+        processes: int = None,
+        concurrency: int = 100,
+        proxies: Sequence[str | Proxy] = None,
+        **client_kwargs,
+    ):
+        """
+        :param task: Асинхронная функция уровня модуля, принимающая Client.
+        :param processes: Количество процессов. По умолчанию по количеству ядер.
+        :param concurrency: Количество одновременных задач в одном процессе.
+        :param proxies: Прокси. Распределяются между аккаунтами по кругу.
+        :param client_kwargs: Параметры Client.
+        """
+        self.task = task
+        self.processes = processes or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.proxies = [
+            proxy.as_url if isinstance(proxy, Proxy) else Proxy.from_str(proxy).as_url
+            for proxy in proxies or ()
+        ]
+        self.client_kwargs = client_kwargs
+
+    def _feed(
+        self,
+        accounts: list[Account],
+        input_queue: multiprocessing.Queue,
+        stopped: threading.Event,
+    ):
+        items = itertools.chain(
+            (
+                (
+                    index,
+                    account.model_dump(exclude={"raw_data"}, exclude_none=True),
+                    self.proxies[index % len(self.proxies)] if self.proxies else None,
+                )
+                for index, account in enumerate(accounts)
+            ),
+            [None] * self.processes,
+        )
+        for item in items:
+            while not stopped.is_set():
+                try:
+                    input_queue.put(item, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+
+    @staticmethod
+    def _merge(account: Account, account_data: dict):
+        for field, value in account_data.items():
+            if getattr(account, field) != value:
+                setattr(account, field, value)
+
+    async def run(self, accounts: Iterable[Account]) -> AsyncIterator[PoolResult]:
+        """
+        :return: Результаты по мере готовности.
+        """
+        accounts = list(accounts)
+        context = multiprocessing.get_context("spawn")
+        input_queue = context.Queue(maxsize=self.processes * self.concurrency * 2)
+        output_queue = context.Queue()
+        workers = [
+            context.Process(
+                target=_worker,
+                args=(
+                    number,
+                    self.task,
+                    input_queue,
+                    output_queue,
+                    self.concurrency,
+                    self.client_kwargs,
+                ),
+                daemon=True,
+            )
+            for number in range(self.processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        loop = asyncio.get_running_loop()
+        stopped = threading.Event()
+        feeder = loop.run_in_executor(None, self._feed, accounts, input_queue, stopped)
+        finished = set()
+        returned = set()
+        try:
+            while len(finished) < len(workers):
+                # Процесс, завершившийся до ожидания, уже передал в очередь все свои сообщения
+                dead = {
+                    number
+                    for number, worker in enumerate(workers)
+                    if not worker.is_alive()
+                } - finished
+                try:
+                    message = await loop.run_in_executor(
+                        None, partial(output_queue.get, timeout=1)
+                    )
+                except queue.Empty:
+                    for number in dead:
+                        logger.error(
+                            f"Worker process {workers[number].pid} died"
+                            f" with exit code {workers[number].exitcode}"
+                        )
+                    finished |= dead
+                    continue
+
+                if isinstance(message, int):
+                    finished.add(message)
+                    continue
+
+                index, account_data, result, exception = message
+                returned.add(index)
+                account = accounts[index]
+                self._merge(account, account_data)
+                yield PoolResult(account, result=result, exception=exception)
+
+            stopped.set()
+            await feeder
+
+            # Аккаунты, задачи которых потерялись вместе с упавшим процессом
+            for index, account in enumerate(accounts):
+                if index not in returned:
+                    exc = TwitterException("Worker process died")
+                    yield PoolResult(account, exception=exc)
+        finally:
+            stopped.set()
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
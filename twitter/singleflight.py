@@ -0,0 +1,40 @@
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+import asyncio
+import json
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые запросы:
+        - Первый вызов с ключом выполняет запрос, остальные ждут его результат.
+        - Результат (или исключение) получают все ожидающие.
+        - Отмена одного из ожидающих не отменяет запрос для остальных.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    @staticmethod
+    def key(operation: str, variables: dict[str, Any]) -> tuple[str, str]:
+        return operation, json.dumps(
+            variables, sort_keys=True, separators=(",", ":"), default=str
+        )
+
+    def _forget(self, key: Hashable, call: asyncio.Future):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Исключение могут не забрать, если все ожидающие были отменены
+        if not call.cancelled():
+            call.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(func())
+            call.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(call)
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,303 @@
+from pathlib import Path
+from time import time
+from typing import Iterable
+import sqlite3
+
+from better_proxy import Proxy
+
+from .account import Account
+from .enums import AccountStatus
+
+_FIELDS = tuple(field for field in Account.model_fields if field != "raw_data")
+_COLUMNS = _FIELDS + ("proxy", "last_used_at", "claimed_until")
+
+
+class AccountStore:
+    """
+    Хранилище аккаунтов в локальной базе данных SQLite:
+        - Изменения аккаунта записываются в одну строку, без перезаписи всего хранилища.
+        - Индексы по статусу, имени пользователя и auth_token. auth_token уникален,
+          аккаунты без auth_token уникальны по имени пользователя и почте.
+        - Выдача (claim) следующих свободных аккаунтов, давно не использовавшихся.
+
+    Хранилище возвращает один и тот же объект Account для одной строки,
+    поэтому изменения аккаунта можно сохранять методом save.
+    """
+
+    def __init__(self, filepath: Path | str):
+        self._connection = sqlite3.connect(
+            str(filepath), check_same_thread=False, isolation_level=None
+        )
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        self._keys: dict[int, int] = {}  # id(account) -> key
+        self._accounts: dict[int, Account] = {}  # key -> account
+
+    def _create_tables(self):
+        columns = ",\n".join(f"    {column}" for column in _COLUMNS)
+        self._connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS accounts (
+                key INTEGER PRIMARY KEY,
+            {columns}
+            );
+            CREATE INDEX IF NOT EXISTS accounts_status ON accounts (status, claimed_until, last_used_at);
+            CREATE INDEX IF NOT EXISTS accounts_username ON accounts (username);
+            CREATE INDEX IF NOT EXISTS accounts_proxy ON accounts (proxy);
+            """)
+        # Хранилища, созданные без уникальных индексов, могут содержать дубликаты:
+        # остается первая добавленная строка
+        self._create_unique_index(
+            "accounts_auth_token_unique",
+            "auth_token",
+            "auth_token IS NOT NULL",
+            drop_index="accounts_auth_token",
+        )
+        # Аккаунты без auth_token различаются по имени пользователя и почте
+        self._create_unique_index(
+            "accounts_login_unique",
+            "lower(COALESCE(username, '')), lower(COALESCE(email, ''))",
+            "auth_token IS NULL",
+        )
+
+    def _create_unique_index(
+        self, name: str, columns: str, where: str, *, drop_index: str = None
+    ):
+        if self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        ).fetchone():
+            return
+
+        drop = f"DROP INDEX IF EXISTS {drop_index};" if drop_index else ""
+        self._connection.executescript(f"""
+            BEGIN;
+            {drop}
+            DELETE FROM accounts WHERE {where} AND key NOT IN (
+                SELECT MIN(key) FROM accounts WHERE {where} GROUP BY {columns}
+            );
+            CREATE UNIQUE INDEX {name} ON accounts ({columns}) WHERE {where};
+            COMMIT;
+            """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    @staticmethod
+    def _values(account: Account, fields: Iterable[str]) -> list:
+        data = account.model_dump(mode="json", include=set(fields))
+        return [data[field] for field in fields]
+
+    def _track(self, row: sqlite3.Row) -> Account:
+        key = row["key"]
+        if key in self._accounts:
+            return self._accounts[key]
+
+        data = {field: row[field] for field in _FIELDS if row[field] is not None}
+        account = Account.model_validate(data)
+        self._accounts[key] = account
+        self._keys[id(account)] = key
+        return account
+
+    def _key(self, account: Account) -> int:
+        try:
+            return self._keys[id(account)]
+        except KeyError:
+            raise ValueError(f"Account {account!r} is not in store") from None
+
+    def add(
+        self, accounts: Iterable[Account], *, proxy: str | Proxy = None
+    ) -> list[Account]:
+        """
+        Добавляет аккаунты одной транзакцией.
+        Аккаунты, которые уже есть в хранилище (тот же объект, тот же auth_token,
+        а без auth_token - те же имя пользователя и почта), пропускаются,
+        поэтому одни и те же аккаунты можно добавлять при каждом запуске.
+
+        :return: Добавленные аккаунты.
+        """
+        if proxy and not isinstance(proxy, Proxy):
+            proxy = Proxy.from_str(proxy)
+        proxy = proxy.as_url if proxy else None
+
+        columns = _FIELDS + ("proxy",)
+        query = (
+            f"INSERT OR IGNORE INTO accounts ({', '.join(columns)})"
+            f" VALUES ({', '.join('?' * len(columns))})"
+        )
+        added = []
+        with self._transaction():
+            for account in accounts:
+                if id(account) in self._keys:
+                    continue
+                if not (account.auth_token or account.username or account.email):
+                    raise ValueError(
+                        f"Account {account!r} has no auth_token, username or email"
+                    )
+
+                cursor = self._connection.execute(
+                    query, self._values(account, _FIELDS) + [proxy]
+                )
+                if not cursor.rowcount:
+                    continue
+                self._accounts[cursor.lastrowid] = account
+                self._keys[id(account)] = cursor.lastrowid
+                added.append(account)
+        return added
+
+    def save(self, account: Account, fields: Iterable[str] = None):
+        """
+        Записывает поля аккаунта в его строку.
+
+        :param fields: Имена полей. По умолчанию все.
+        """
+        fields = [field for field in fields or _FIELDS if field in _FIELDS]
+        if not fields:
+            return
+
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        self._connection.execute(
+            f"UPDATE accounts SET {assignments} WHERE key = ?",
+            self._values(account, fields) + [self._key(account)],
+        )
+
+    def set_proxy(self, account: Account, proxy: str | Proxy | None):
+        if proxy and not isinstance(proxy, Proxy):
+            proxy = Proxy.from_str(proxy)
+        self._connection.execute(
+            "UPDATE accounts SET proxy = ? WHERE key = ?",
+            (proxy.as_url if proxy else None, self._key(account)),
+        )
+
+    def get_proxy(self, account: Account) -> str | None:
+        row = self._connection.execute(
+            "SELECT proxy FROM accounts WHERE key = ?", (self._key(account),)
+        ).fetchone()
+        return row["proxy"] if row else None
+
+    def remove(self, account: Account):
+        key = self._key(account)
+        self._connection.execute("DELETE FROM accounts WHERE key = ?", (key,))
+        del self._keys[id(account)]
+        del self._accounts[key]
+
+    @staticmethod
+    def _where(
+        status: AccountStatus | Iterable[AccountStatus] = None,
+        username: str = None,
+        proxy: str | Proxy = None,
+    ) -> tuple[str, list]:
+        conditions, params = [], []
+        if status is not None:
+            statuses = [status] if isinstance(status, str) else list(status)
+            conditions.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(str(status) for status in statuses)
+        if username is not None:
+            conditions.append("username = ?")
+            params.append(username)
+        if proxy is not None:
+            if not isinstance(proxy, Proxy):
+                proxy = Proxy.from_str(proxy)
+            conditions.append("proxy = ?")
+            params.append(proxy.as_url)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def get_accounts(
+        self,
+        *,
+        status: AccountStatus | Iterable[AccountStatus] = None,
+        username: str = None,
+        proxy: str | Proxy = None,
+        used_before: float = None,
+        limit: int = None,
+    ) -> list[Account]:
+        """
+        :param status: Статус или статусы аккаунтов.
+        :param used_before: Только аккаунты, не использовавшиеся с этого момента (Unix timestamp).
+        :param limit: Максимальное количество аккаунтов.
+        :return: Аккаунты, от давно не использовавшихся к недавно использованным.
+        """
+        where, params = self._where(status, username, proxy)
+        if used_before is not None:
+            where += " AND" if where else " WHERE"
+            where += " (last_used_at IS NULL OR last_used_at < ?)"
+            params.append(used_before)
+        query = f"SELECT * FROM accounts{where} ORDER BY last_used_at IS NOT NULL, last_used_at"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self._connection.execute(query, params).fetchall()
+        return [self._track(row) for row in rows]
+
+    def count(
+        self,
+        *,
+        status: AccountStatus | Iterable[AccountStatus] = None,
+        proxy: str | Proxy = None,
+    ) -> int:
+        where, params = self._where(status, proxy=proxy)
+        query = f"SELECT COUNT(*) FROM accounts{where}"
+        return self._connection.execute(query, params).fetchone()[0]
+
+    def claim(
+        self,
+        count: int,
+        *,
+        status: AccountStatus | Iterable[AccountStatus] = (
+            AccountStatus.GOOD,
+            AccountStatus.UNKNOWN,
+        ),
+        lease: float = 600,
+    ) -> list[Account]:
+        """
+        Выдает следующие свободные аккаунты, от давно не использовавшихся к недавно использованным.
+        Выданные аккаунты не выдаются повторно, пока не будут освобождены или не истечет lease.
+
+        :param count: Количество аккаунтов.
+        :param status: Статус или статусы аккаунтов.
+        :param lease: Время (сек.), на которое аккаунты выдаются.
+        """
+        now = time()
+        where, params = self._where(status)
+        where += " AND (claimed_until IS NULL OR claimed_until < ?)"
+        query = (
+            f"SELECT * FROM accounts{where}"
+            f" ORDER BY last_used_at IS NOT NULL, last_used_at LIMIT ?"
+        )
+        with self._transaction():
+            rows = self._connection.execute(query, params + [now, count]).fetchall()
+            self._connection.executemany(
+                "UPDATE accounts SET claimed_until = ?, last_used_at = ? WHERE key = ?",
+                [(now + lease, now, row["key"]) for row in rows],
+            )
+        return [self._track(row) for row in rows]
+
+    def release(self, accounts: Iterable[Account]):
+        self._connection.executemany(
+            "UPDATE accounts SET claimed_until = NULL WHERE key = ?",
+            [(self._key(account),) for account in accounts],
+        )
+
+    def _transaction(self):
+        return _Transaction(self._connection)
+
+
+class _Transaction:
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+
+    def __enter__(self):
+        self._connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, *args):
+        self._connection.execute("ROLLBACK" if exc_type else "COMMIT")
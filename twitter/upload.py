@@ -0,0 +1,196 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import time
+from typing import AsyncIterable, AsyncIterator, Container
+import hashlib
+import json
+import mimetypes
+import mmap
+
+from .utils import load_json, write_json
+
+MediaSource = bytes | str | Path | AsyncIterable[bytes]
+"""
+Источник данных для загрузки: байты, путь до файла или асинхронный итератор байтов.
+"""
+
+SEGMENT_SIZE = 1024 * 1024
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def guess_media_type(header: bytes) -> str | None:
+    """
+    Определяет MIME тип по первым байтам файла.
+    """
+    for signature, media_type in _SIGNATURES:
+        if header.startswith(signature):
+            return media_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header[4:8] == b"ftyp":
+        return "video/quicktime" if header[8:10] == b"qt" else "video/mp4"
+    return None
+
+
+def guess_media_category(media_type: str) -> str | None:
+    """
+    Категория нужна GIF и видео: они обрабатываются асинхронно после FINALIZE.
+    """
+    if media_type == "image/gif":
+        return "tweet_gif"
+    if media_type.startswith("video/"):
+        return "tweet_video"
+    return None
+
+
+def describe_media(
+    media: MediaSource,
+    *,
+    media_type: str = None,
+    total_bytes: int = None,
+) -> tuple[int, str]:
+    """
+    :return: Размер в байтах и MIME тип.
+    """
+    if isinstance(media, (bytes, bytearray, memoryview)):
+        total_bytes = len(media)
+        media_type = media_type or guess_media_type(bytes(media[:16]))
+    elif isinstance(media, (str, Path)):
+        path = Path(media)
+        total_bytes = path.stat().st_size
+        if not media_type:
+            with open(path, "rb") as file:
+                media_type = guess_media_type(file.read(16))
+            media_type = media_type or mimetypes.guess_type(path)[0]
+    elif total_bytes is None:
+        raise ValueError("Specify total_bytes for async media source")
+
+    if not total_bytes:
+        raise ValueError("Media is empty")
+    if not media_type:
+        raise ValueError("Failed to guess media type. Specify media_type")
+    return total_bytes, media_type
+
+
+def media_digest(media: MediaSource) -> str | None:
+    """
+    :return: SHA-256 содержимого или None для асинхронного источника (его нельзя прочитать дважды).
+    """
+    if isinstance(media, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(media).hexdigest()
+    if isinstance(media, (str, Path)):
+        with open(media, "rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+    return None
+
+
+async def iter_segments(
+    media: MediaSource,
+    segment_size: int = SEGMENT_SIZE,
+    *,
+    skip: Container[int] = (),
+) -> AsyncIterator[tuple[int, bytes]]:
+    """
+    Делит данные на части по segment_size байт.
+    Файл отображается в память (mmap) и читается по одной части за раз.
+
+    :param skip: Индексы частей, которые не нужно возвращать (уже загружены).
+    :return: Индекс и данные части.
+    """
+    if isinstance(media, (bytes, bytearray, memoryview)):
+        view = memoryview(media)
+        for index, start in enumerate(range(0, len(view), segment_size)):
+            if index not in skip:
+                yield index, bytes(view[start : start + segment_size])
+        return
+
+    if isinstance(media, (str, Path)):
+        with open(media, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for index, start in enumerate(range(0, len(mapped), segment_size)):
+                    if index not in skip:
+                        yield index, mapped[start : start + segment_size]
+        return
+
+    # Асинхронный источник нельзя перемотать: загруженные части читаются и пропускаются
+    index = 0
+    buffer = bytearray()
+    async for chunk in media:
+        buffer += chunk
+        while len(buffer) >= segment_size:
+            if index not in skip:
+                yield index, bytes(buffer[:segment_size])
+            del buffer[:segment_size]
+            index += 1
+    if buffer and index not in skip:
+        yield index, bytes(buffer)
+
+
+@dataclass
+class UploadCheckpoint:
+    """
+    Состояние загрузки по частям: позволяет продолжить прерванную загрузку, а не начинать заново.
+    """
+
+    media_id: int
+    total_bytes: int
+    media_type: str
+    segment_size: int
+    expires_at: float  # Unix timestamp
+    digest: str | None = None  # SHA-256 содержимого (media_digest)
+    segments_done: set[int] = field(default_factory=set)
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at <= time()
+
+    def matches(
+        self, total_bytes: int, media_type: str, segment_size: int, digest: str | None
+    ) -> bool:
+        """
+        Продолжить можно только загрузку того же содержимого: иначе к частям другого файла
+        того же размера добавились бы новые части и медиа было бы испорчено.
+        Содержимое асинхронного источника проверить нельзя, поэтому его загрузка не продолжается.
+        """
+        return (
+            not self.expired
+            and digest is not None
+            and self.digest == digest
+            and self.total_bytes == total_bytes
+            and self.media_type == media_type
+            and self.segment_size == segment_size
+        )
+
+    @classmethod
+    def load(cls, filepath: Path | str) -> "UploadCheckpoint | None":
+        """
+        :return: Состояние загрузки или None, если файла нет или он поврежден.
+        """
+        try:
+            data = load_json(filepath)
+            data["segments_done"] = set(data["segments_done"])
+            return cls(**data)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            return None
+
+    def save(self, filepath: Path | str):
+        # Запись через временный файл: прерванная запись не портит прежнее состояние
+        filepath = Path(filepath)
+        temp_filepath = filepath.with_name(f"{filepath.name}.tmp")
+        data = {
+            "media_id": self.media_id,
+            "total_bytes": self.total_bytes,
+            "media_type": self.media_type,
+            "segment_size": self.segment_size,
+            "expires_at": self.expires_at,
+            "digest": self.digest,
+            "segments_done": sorted(self.segments_done),
+        }
+        write_json(temp_filepath, data)
+        temp_filepath.replace(filepath)
@@ -17,6 +17,8 @@ from .other import (
     to_datetime,
     hidden_value,
     tweets_data_from_instructions,
+    users_data_from_instructions,
+    cursor_from_instructions,
     encode_x_client_transaction_id,
 )
 
@@ -36,5 +38,7 @@ __all__ = [
     "to_datetime",
     "hidden_value",
     "tweets_data_from_instructions",
+    "users_data_from_instructions",
+    "cursor_from_instructions",
     "encode_x_client_transaction_id",
 ]
@@ -31,7 +31,69 @@ def tweets_data_from_instructions(instructions: dict) -> list[dict]:
     return tweets
 
 
+def users_data_from_instructions(
+    instructions: list[dict], *, include_unavailable: bool = False
+) -> list[dict]:
+    """
+    :param include_unavailable: Возвращать и недоступных (удаленных, приостановленных) пользователей.
+    """
+    users = []
+    for instruction in instructions:
+        if instruction["type"] == "TimelineAddEntries":
+            for entry in instruction["entries"]:
+                if entry["entryId"].startswith("user-"):
+                    user_data = entry["content"]["itemContent"]["user_results"].get(
+                        "result", {}
+                    )
+                    # Недоступные (удаленные, приостановленные) пользователи приходят без данных
+                    if include_unavailable or "legacy" in user_data:
+                        users.append(user_data)
+    return users
+
+
+def cursor_from_instructions(
+    instructions: list[dict], cursor_type: str = "Bottom"
+) -> str | None:
+    """
+    :return: Курсор следующей (Bottom) или предыдущей (Top) страницы.
+    """
+    for instruction in instructions:
+        if instruction["type"] == "TimelineAddEntries":
+            entries = instruction["entries"]
+        elif instruction["type"] == "TimelineReplaceEntry":
+            entries = [instruction["entry"]]
+        else:
+            continue
+
+        for entry in entries:
+            content = entry["content"]
+            if (
+                content.get("entryType") == "TimelineTimelineCursor"
+                and content.get("cursorType") == cursor_type
+            ):
+                return content["value"]
+    return None
+
+
+_MONTHS = {
+    month: number
+    for number, month in enumerate(
+        "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(), 1
+    )
+}
+
+
 def to_datetime(twitter_datetime: str):
+    # Разбор вручную в несколько раз быстрее strptime. Формат: "Wed Oct 10 20:19:24 +0000 2018"
+    try:
+        _, month, day, time, offset, year = twitter_datetime.split(" ")
+        hour, minute, second = time.split(":")
+        if offset == "+0000":
+            return datetime(
+                int(year), _MONTHS[month], int(day), int(hour), int(minute), int(second)
+            )
+    except (ValueError, KeyError):
+        pass
     return datetime.strptime(twitter_datetime, "%a %b %d %H:%M:%S +0000 %Y")
 
 